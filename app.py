@@ -1,23 +1,25 @@
 import calendar
 import pandas as pd
 import streamlit as st
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 
-from lib.data_store import read_csv, write_csv
+from lib.calendar_index import build_day_index, count_for_day, rows_for_day
+from lib.data_store import read_tables, validation_errors
+from lib.github_store import StaleWriteError
+from lib.schema import SCOPES, TASK_STATUS
+from lib.task_repo import task_repo
+from lib.ui import io_debug_sidebar, io_debug_start, pending_writes_sidebar, show_write_error
 
 # --------------------------------------------------
 # PAGE
 # --------------------------------------------------
 st.set_page_config(page_title="Event Ops", layout="wide")
+io_debug_start(__file__)
 st.title("🏐 Event Operations Dashboard")
-
-EVENT_COLS = ["event_id","event_name","location","start_date","end_date","status"]
-TASK_COLS  = ["task_id","scope","event_id","task_name","due_date","owner","status","priority","category","notes"]
-
-TASK_STATUS = ["Not started","In progress","Done","Blocked"]
-SCOPE = ["General","Event"]
+pending_writes_sidebar()
 
 today = date.today()
+today_ts = pd.Timestamp(today)
 
 # --------------------------------------------------
 # CSS (KEEP YOUR BADGES)
@@ -56,46 +58,27 @@ st.markdown("""
 # --------------------------------------------------
 # HELPERS
 # --------------------------------------------------
-def parse_date(s):
-    try:
-        return datetime.strptime(str(s), "%Y-%m-%d").date()
-    except:
-        return None
-
-def next_int_id(df, col):
-    if df.empty:
-        return 1
-    s = pd.to_numeric(df[col], errors="coerce").dropna()
-    return int(s.max()) + 1 if not s.empty else 1
-
-def update_task(task_id, updates):
-    base = read_csv("data/tasks.csv", TASK_COLS)
-    mask = base["task_id"].astype(str) == str(task_id)
-    for k, v in updates.items():
-        base.loc[mask, k] = v
-    write_csv("data/tasks.csv", base, f"Update task {task_id}")
-
 def mark_done(task_id):
-    update_task(task_id, {"status": "Done"})
+    task_repo.patch(task_id, {"status": "Done"})
 
 # --------------------------------------------------
 # LOAD DATA
 # --------------------------------------------------
-events = read_csv("data/events.csv", EVENT_COLS)
-tasks  = read_csv("data/tasks.csv", TASK_COLS)
+tables = read_tables(typed=["data/events.csv", "data/tasks.csv"])
+events = tables["data/events.csv"]
+tasks  = tables["data/tasks.csv"]
 
 tasks["scope"] = tasks["scope"].astype(str).fillna("")
 tasks.loc[tasks["scope"].str.strip() == "", "scope"] = "General"
 
-events["start"] = events["start_date"].apply(parse_date)
-events["end"]   = events["end_date"].apply(parse_date)
-tasks["due"]    = tasks["due_date"].apply(parse_date)
-
 tasks = tasks.merge(events[["event_id","event_name"]], on="event_id", how="left")
 tasks["event_name"] = tasks["event_name"].fillna("")
 
+# day -> row positions, built once per load; calendar cells and the popup read from it
+day_index = build_day_index(tasks, "due")
+
 def tasks_for_day(d):
-    return tasks[tasks["due"] == d]
+    return rows_for_day(tasks, day_index, d)
 
 # --------------------------------------------------
 # DASHBOARD
@@ -104,9 +87,17 @@ st.subheader("Dashboard")
 
 c1,c2,c3,c4 = st.columns(4)
 c1.metric("Events", len(events))
-c2.metric("Ongoing", len(events[(events["start"]<=today)&(events["end"]>=today)]))
-c3.metric("Upcoming 14d", len(events[(events["start"]>today)&(events["start"]<=today+timedelta(days=14))]))
-c4.metric("Overdue tasks", len(tasks[(tasks["due"]<today)&(tasks["status"]!="Done")]))
+c2.metric("Ongoing", len(events[(events["start"]<=today_ts)&(events["end"]>=today_ts)]))
+c3.metric("Upcoming 14d", len(events[(events["start"]>today_ts)&(events["start"]<=today_ts+timedelta(days=14))]))
+c4.metric("Overdue tasks", len(tasks[(tasks["due"]<today_ts)&(tasks["status"]!="Done")]))
+
+problems = pd.concat([
+    validation_errors("data/events.csv").assign(file="events.csv"),
+    validation_errors("data/tasks.csv").assign(file="tasks.csv"),
+], ignore_index=True)
+if not problems.empty:
+    with st.expander(f"⚠️ {len(problems)} data problem(s) found"):
+        st.dataframe(problems, use_container_width=True)
 
 st.divider()
 
@@ -138,19 +129,19 @@ for week in weeks:
                 st.markdown(f"<div class='day off'>{d.day}</div>", unsafe_allow_html=True)
                 continue
 
-            td = tasks_for_day(d)
+            n_tasks = count_for_day(day_index, d)
             label = f"{d.day} ⭐" if d == today else str(d.day)
 
-            st.markdown(f"<div class='day {'empty' if td.empty else ''}'>", unsafe_allow_html=True)
+            st.markdown(f"<div class='day {'empty' if n_tasks == 0 else ''}'>", unsafe_allow_html=True)
 
             if st.button(label, key=f"day_{d}"):
                 st.session_state["popup_date"] = d.isoformat()
                 st.session_state["show_day_popup"] = True
 
             # ✅ RESTORED BADGE STYLE (NO TEXT)
-            if not td.empty:
+            if n_tasks:
                 st.markdown(
-                    f"<span class='badge b-tk'>🟨 T {len(td)}</span>",
+                    f"<span class='badge b-tk'>🟨 T {n_tasks}</span>",
                     unsafe_allow_html=True
                 )
 
@@ -160,7 +151,7 @@ for week in weeks:
 # DAY POPUP
 # --------------------------------------------------
 if st.session_state.get("show_day_popup"):
-    d = parse_date(st.session_state.get("popup_date"))
+    d = date.fromisoformat(st.session_state.get("popup_date"))
 
     @st.dialog(f"📅 {d}")
     def day_dialog():
@@ -182,15 +173,19 @@ if st.session_state.get("show_day_popup"):
                 with right:
                     if not is_done:
                         if st.button("✔", key=f"done_{r['task_id']}"):
-                            mark_done(r["task_id"])
-                            st.rerun()
+                            try:
+                                mark_done(r["task_id"])
+                            except StaleWriteError as err:
+                                show_write_error(err)
+                            else:
+                                st.rerun()
 
         st.divider()
 
         st.markdown("### ➕ Add task")
 
         with st.form("add_task_popup"):
-            scope_in = st.selectbox("Scope", SCOPE)
+            scope_in = st.selectbox("Scope", SCOPES)
             event_id = ""
             if scope_in == "Event" and not events.empty:
                 pick = st.selectbox(
@@ -207,10 +202,7 @@ if st.session_state.get("show_day_popup"):
             add = st.form_submit_button("Add task")
 
         if add:
-            base = read_csv("data/tasks.csv", TASK_COLS)
-            new_id = str(next_int_id(base,"task_id"))
             row = {
-                "task_id": new_id,
                 "scope": scope_in,
                 "event_id": event_id if scope_in=="Event" else "",
                 "task_name": task_name,
@@ -221,10 +213,13 @@ if st.session_state.get("show_day_popup"):
                 "category": "",
                 "notes": notes,
             }
-            base = pd.concat([base, pd.DataFrame([row])], ignore_index=True)
-            write_csv("data/tasks.csv", base, f"Add task {new_id}")
-            st.success("Task added.")
-            st.rerun()
+            try:
+                task_repo.insert_many([row])
+            except StaleWriteError as err:
+                show_write_error(err)
+            else:
+                st.success("Task added.")
+                st.rerun()
 
         if st.button("Close"):
             st.session_state["show_day_popup"] = False
@@ -237,3 +232,5 @@ if st.session_state.get("show_day_popup"):
 # --------------------------------------------------
 st.subheader("Legend")
 st.markdown("🟦 Event • 🟨 Task • 🔴 Overdue • 🟩 Ongoing")
+
+io_debug_sidebar()
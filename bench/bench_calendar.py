@@ -0,0 +1,65 @@
+"""
+Calendar look-up benchmark: boolean scan per cell vs. the day index.
+
+    python -m bench.bench_calendar --tasks 100000
+"""
+import argparse
+import calendar
+import random
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from lib.calendar_index import build_day_index, count_for_day, rows_for_day
+
+def make_tasks(n: int, seed: int = 0) -> pd.DataFrame:
+    rnd = random.Random(seed)
+    start = date(2025, 1, 1)
+    days = [start + timedelta(days=rnd.randrange(730)) for _ in range(n)]
+    # ~2% of rows without a parsable due date, like real data
+    days = [None if rnd.random() < 0.02 else d for d in days]
+    return pd.DataFrame({"task_id": [str(i) for i in range(1, n + 1)], "due": pd.to_datetime(days)})
+
+def month_cells(year: int, month: int) -> list:
+    return [d for week in calendar.Calendar().monthdatescalendar(year, month) for d in week]
+
+def bench(n: int, repeat: int = 5) -> dict:
+    tasks = make_tasks(n)
+    cells = month_cells(2026, 3)
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        scan_counts = [len(tasks[tasks["due"] == pd.Timestamp(d)]) for d in cells]
+    scan = (time.perf_counter() - t0) / repeat
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        index = build_day_index(tasks, "due")
+    build = (time.perf_counter() - t0) / repeat
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        index_counts = [count_for_day(index, d) for d in cells]
+        rows_for_day(tasks, index, cells[10])
+    lookup = (time.perf_counter() - t0) / repeat
+
+    assert scan_counts == index_counts
+    return {
+        "tasks": n,
+        "cells": len(cells),
+        "scan_ms": round(scan * 1000, 2),
+        "index_build_ms": round(build * 1000, 2),
+        "index_lookup_ms": round(lookup * 1000, 3),
+        "per_cell_us": round(lookup / len(cells) * 1e6, 2),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--tasks", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = ap.parse_args()
+    for n in args.tasks:
+        print(bench(n))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+End-to-end benchmark of the data layer and page workloads on synthetic data.
+
+    python -m bench.bench_suite --events 2000 --tasks 50000 --out results.json
+    python -m bench.bench_suite --tasks 50000 --compare results.json
+
+Runs against the local backend in a temporary directory, so nothing touches
+GitHub or the checked-in data/. --backend fake-github runs the same cases
+through the GitHub backend against bench.fake_github (with --latency/--jitter
+ms per request) and also reports API requests per run, plus the read cache
+and rate limiter counters for the whole suite under "github".
+Each case reports the median and min of --repeat runs in milliseconds;
+"cold" cases drop every in-process cache and snapshot first, "warm" cases
+reuse them like a Streamlit rerun would.
+"""
+import argparse
+import calendar
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+
+from bench.fake_github import FakeGitHub
+from bench.synthetic import write_dataset
+
+def _configure(root: str, backend: str, latency: float, jitter: float):
+    """Point lib at the synthetic data; returns the FakeGitHub for fake-github runs."""
+    os.environ["DATA_DIR"] = root
+    os.environ["SNAPSHOT_DIR"] = os.path.join(root, "snapshots")
+    os.environ["BLOB_CACHE_DIR"] = os.path.join(root, "blobs")   # never the app's own .cache/blobs
+    for flag in ("WRITE_BEHIND", "JOURNAL", "PARTITIONS"):
+        os.environ.pop(flag, None)
+    if backend == "local":
+        os.environ["DATA_BACKEND"] = "local"
+        return None
+    fake = FakeGitHub(latency=latency, jitter=jitter, seed=0).start()
+    fake.repo.seed(root, fake.branch)
+    os.environ.update(
+        DATA_BACKEND="github", GITHUB_API_URL=fake.url, GITHUB_OWNER="bench", GITHUB_REPO="ops",
+        GITHUB_TOKEN="bench", GITHUB_BRANCH=fake.branch, GITHUB_MAX_RPS="1000", GITHUB_BURST="1000",
+    )
+    return fake
+
+def _drop_caches():
+    from lib import blob_cache, data_store
+    from lib.backends import get_backend
+
+    from lib.github_store import clear_cache
+
+    data_store._typed.clear()
+    data_store._problems.clear()
+    data_store._combined.clear()
+    get_backend()._frames.clear()
+    clear_cache()
+    shutil.rmtree(os.environ["SNAPSHOT_DIR"], ignore_errors=True)
+    shutil.rmtree(os.environ["BLOB_CACHE_DIR"], ignore_errors=True)
+    blob_cache._state["bytes"] = None
+
+def _drop_memory():
+    """Forget in-process caches but keep snapshots on disk (a fresh process)."""
+    from lib import data_store
+    from lib.backends import get_backend
+
+    data_store._typed.clear()
+    get_backend()._frames.clear()
+
+def _time(fn, repeat: int, setup=None, fake: FakeGitHub | None = None) -> dict:
+    runs, requests = [], 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        before = fake.snapshot_stats()["requests"] if fake is not None else 0
+        t0 = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t0) * 1000)
+        if fake is not None:
+            requests += fake.snapshot_stats()["requests"] - before
+    out = {"median_ms": round(statistics.median(runs), 3), "min_ms": round(min(runs), 3), "runs": repeat}
+    if fake is not None:
+        out["requests_per_run"] = round(requests / repeat, 2)
+    return out
+
+# --------------------------------------------------
+# CASES
+# --------------------------------------------------
+# Each case mirrors what a page does on a rerun, using the same lib calls.
+
+def _calendar_month(year: int, month: int):
+    from lib.calendar_index import build_day_index, count_for_day
+    from lib.data_store import read_typed
+
+    events = read_typed("data/events.csv")
+    tasks = read_typed("data/tasks.csv")
+    tasks = tasks.merge(events[["event_id", "event_name"]], on="event_id", how="left")
+    index = build_day_index(tasks, "due")
+    weeks = calendar.Calendar().monthdatescalendar(year, month)
+    return [count_for_day(index, d) for week in weeks for d in week]
+
+def _tasks_page(q: str, sort_by: str):
+    from lib.data_store import read_csv, read_typed
+    from lib.search import task_search_index
+    from lib.task_views import filter_tasks, page_slice, sort_tasks
+
+    events = read_csv("data/events.csv")
+    tasks = read_typed("data/tasks.csv")
+    tasks_sha = tasks.attrs.get("sha")
+    tasks = tasks.merge(events[["event_id", "event_name", "location"]], on="event_id", how="left")
+    tasks["event_name"] = tasks["event_name"].fillna("")
+    index = task_search_index(tasks, events, tasks_sha=tasks_sha)
+    view = sort_tasks(filter_tasks(tasks, q, "All", "All", index=index), sort_by)
+    return page_slice(view, 1, 50)
+
+def _event_detail(event_id: str):
+    from lib.data_store import read_typed
+
+    events = read_typed("data/events.csv")
+    tasks = read_typed("data/tasks.csv")
+    event = events[events["event_id"] == event_id]
+    return event, tasks[tasks["event_id"] == event_id]
+
+def _apply_general_template(name: str):
+    from lib.data_store import read_csv
+    from lib.task_repo import task_repo
+
+    tpl = read_csv("data/task_templates.csv")
+    rows = tpl[(tpl["scope"] == "General") & (tpl["template_name"] == name)]
+    today = date.today()
+    out = [{
+        "scope": "General", "event_id": "", "task_name": r["task_name"],
+        "due_date": (today + timedelta(days=int(r["due_offset_days"] or 0))).isoformat(),
+        "owner": r["default_owner"], "status": "Not started", "priority": r["priority"],
+        "category": r["category"], "notes": f"From template: {name}",
+    } for _, r in rows.iterrows()]
+    return task_repo.insert_many(out, f"Apply General template {name}")
+
+def run(n_events: int, n_tasks: int, repeat: int, seed: int = 0,
+        backend: str = "local", latency: float = 0.0, jitter: float = 0.0) -> dict:
+    root = tempfile.mkdtemp(prefix="event-ops-bench-")
+    fake = None
+    try:
+        sizes = write_dataset(root, n_events, n_tasks, seed)
+        fake = _configure(root, backend, latency, jitter)
+
+        def timed(fn, setup=None):
+            return _time(fn, repeat, setup, fake)
+
+        from lib.data_store import read_csv, read_typed, write_csv
+        from lib.task_repo import task_repo
+
+        event_id = read_csv("data/events.csv")["event_id"].iloc[n_events // 2]
+        general = read_csv("data/task_templates.csv").query("scope == 'General'")["template_name"].iloc[0]
+        tasks = read_csv("data/tasks.csv")
+        some_id = tasks["task_id"].iloc[len(tasks) // 2]
+
+        def write_tasks():
+            df = read_csv("data/tasks.csv")
+            write_csv("data/tasks.csv", df, "bench: rewrite tasks")
+
+        results = {
+            "read_csv_tasks_cold": timed(lambda: read_csv("data/tasks.csv"), _drop_caches),
+            "read_csv_tasks_warm": timed(lambda: read_csv("data/tasks.csv")),
+            "read_typed_tasks_cold": timed(lambda: read_typed("data/tasks.csv"), _drop_caches),
+            "read_typed_tasks_snapshot": timed(
+                lambda: read_typed("data/tasks.csv"),
+                lambda: (read_typed("data/tasks.csv"), _drop_memory()),
+            ),
+            "read_typed_tasks_warm": timed(lambda: read_typed("data/tasks.csv")),
+            "write_csv_tasks": timed(write_tasks),
+            "patch_one_task": timed(lambda: task_repo.patch(some_id, {"notes": str(time.perf_counter())})),
+            "calendar_month_cold": timed(lambda: _calendar_month(2026, 3), _drop_caches),
+            "calendar_month_warm": timed(lambda: _calendar_month(2026, 3)),
+            "tasks_page_due_date": timed(lambda: _tasks_page("", "Due date")),
+            "tasks_page_search": timed(lambda: _tasks_page("confirm", "Relevance")),
+            "event_detail_warm": timed(lambda: _event_detail(event_id)),
+            "apply_general_template": timed(lambda: _apply_general_template(general)),
+        }
+        meta = _meta(n_events, n_tasks, repeat, seed, sizes)
+        meta.update(backend=backend, latency_ms=latency, jitter_ms=jitter)
+        out = {"meta": meta, "results": results}
+        if fake is not None:
+            from lib.github_store import cache_stats, rate_limit_stats
+
+            # totals over the whole suite, cold cases included
+            out["github"] = {"read_cache": cache_stats(), "rate_limit": rate_limit_stats()}
+        return out
+    finally:
+        if fake is not None:
+            fake.stop()
+        shutil.rmtree(root, ignore_errors=True)
+
+def _meta(n_events: int, n_tasks: int, repeat: int, seed: int, sizes: dict) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "events": n_events,
+        "tasks": n_tasks,
+        "repeat": repeat,
+        "seed": seed,
+        "rows": sizes,
+    }
+
+def compare(old: dict, new: dict) -> list[str]:
+    """One line per case: old and new median, and the ratio new/old."""
+    lines = []
+    for name, cur in new["results"].items():
+        prev = old.get("results", {}).get(name)
+        if prev is None:
+            lines.append(f"{name:28s} {'':>10s} {cur['median_ms']:10.2f} ms   (new)")
+            continue
+        ratio = cur["median_ms"] / prev["median_ms"] if prev["median_ms"] else float("inf")
+        flag = "  <-- slower" if ratio > 1.2 else ""
+        lines.append(f"{name:28s} {prev['median_ms']:10.2f} {cur['median_ms']:10.2f} ms  x{ratio:.2f}{flag}")
+    return lines
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--events", type=int, default=2000)
+    ap.add_argument("--tasks", type=int, default=50000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--backend", choices=["local", "fake-github"], default="local")
+    ap.add_argument("--latency", type=float, default=50.0, help="fake-github: ms per API request")
+    ap.add_argument("--jitter", type=float, default=10.0, help="fake-github: ± ms")
+    ap.add_argument("--out", help="write the results JSON here")
+    ap.add_argument("--compare", help="earlier results JSON to compare against")
+    args = ap.parse_args()
+
+    result = run(args.events, args.tasks, args.repeat, args.seed, args.backend, args.latency, args.jitter)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print("\n".join(compare(json.load(f), result)))
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+Local stand-in for the parts of the GitHub REST API that lib.github_store uses.
+
+    python -m bench.fake_github --port 8765 --seed-dir . --latency 80 --jitter 40
+
+then run the app (or a benchmark) against it with
+
+    GITHUB_API_URL=http://127.0.0.1:8765 GITHUB_OWNER=local GITHUB_REPO=ops GITHUB_TOKEN=x
+
+Implemented: Contents GET (raw and JSON, ETag / If-None-Match) and PUT (sha
+checks: 409 on a stale sha, 422 when an existing file is written without
+one); Git Data blobs, trees ("<ref>:<dir>" and recursive), commits and refs
+(a non-fast-forward ref update is a 422). Every response carries
+X-RateLimit-* headers; the quota, latency, jitter, 5xx rate and secondary
+(429) rate limits are configurable. GET /_stats returns request counts per
+route, POST /_reset clears them.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+def _blob_sha(data: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def _obj_sha(kind: str, payload) -> str:
+    return hashlib.sha1(kind.encode() + json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+class RepoState:
+    """One branch-based repo: blobs, flat trees ({path: blob sha}), commits and refs."""
+
+    def __init__(self, branch: str = "main"):
+        self.blobs: dict[str, bytes] = {}
+        self.trees: dict[str, dict[str, str]] = {}
+        self.commits: dict[str, dict] = {}
+        self.refs: dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.commit_files({}, "Initial commit", branch, parent=None)
+
+    def put_blob(self, data: bytes) -> str:
+        sha = _blob_sha(data)
+        self.blobs[sha] = data
+        return sha
+
+    def put_tree(self, files: dict[str, str]) -> str:
+        sha = _obj_sha("tree", files)
+        self.trees[sha] = dict(files)
+        return sha
+
+    def put_commit(self, tree: str, parents: list[str], message: str) -> str:
+        sha = _obj_sha("commit", {"tree": tree, "parents": parents, "message": message, "t": time.time_ns()})
+        self.commits[sha] = {"tree": tree, "parents": parents, "message": message}
+        return sha
+
+    def files_at(self, ref: str) -> dict[str, str] | None:
+        commit = self.refs.get(ref, ref)
+        if commit in self.commits:
+            return self.trees[self.commits[commit]["tree"]]
+        return self.trees.get(ref)
+
+    def commit_files(self, changes: dict, message: str, branch: str, parent: str | None = "head") -> str:
+        """changes: {path: bytes or None to delete}; commits on top of the branch head."""
+        head = self.refs.get(branch) if parent == "head" else parent
+        files = dict(self.trees[self.commits[head]["tree"]]) if head else {}
+        for path, data in changes.items():
+            if data is None:
+                files.pop(path, None)
+            else:
+                files[path] = self.put_blob(data)
+        commit = self.put_commit(self.put_tree(files), [head] if head else [], message)
+        self.refs[branch] = commit
+        return commit
+
+    def seed(self, root: str, branch: str, subdir: str = "data"):
+        changes = {}
+        base = os.path.join(root, subdir)
+        for dirpath, _, names in os.walk(base):
+            for name in names:
+                full = os.path.join(dirpath, name)
+                rel = os.path.relpath(full, root).replace(os.sep, "/")
+                with open(full, "rb") as f:
+                    changes[rel] = f.read()
+        if changes:
+            self.commit_files(changes, f"Seed from {base}", branch)
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients dropping retried / rate-limited connections are expected here
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class FakeGitHub:
+    """
+    The server plus its knobs. latency/jitter are milliseconds; error_rate and
+    secondary_rate are probabilities per request; rate_limit is the quota per
+    rate_window seconds.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, branch: str = "main",
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 secondary_rate: float = 0.0, rate_limit: int = 5000, rate_window: float = 3600.0,
+                 seed: int | None = None):
+        self.branch = branch
+        self.repo = RepoState(branch)
+        self.latency, self.jitter = latency, jitter
+        self.error_rate, self.secondary_rate = error_rate, secondary_rate
+        self.rate_limit, self.rate_window = rate_limit, rate_window
+        self.random = random.Random(seed)
+        self._window_start = time.time()
+        self._used = 0
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+        self.httpd = _Server((host, port), _handler(self))
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGitHub":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-github", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.stats = {"requests": 0, "routes": {}, "not_modified": 0, "bytes_out": 0,
+                          "injected_errors": 0, "rate_limited": 0, "conflicts": 0}
+
+    def count(self, key: str, n: int = 1, route: str | None = None):
+        with self._stats_lock:
+            if route is not None:
+                self.stats["routes"][route] = self.stats["routes"].get(route, 0) + 1
+            if key:
+                self.stats[key] += n
+
+    def snapshot_stats(self) -> dict:
+        with self._stats_lock:
+            return json.loads(json.dumps(self.stats))
+
+    def take_quota(self, charge: bool) -> tuple[bool, dict]:
+        """(allowed, rate-limit headers) for one request."""
+        with self._stats_lock:
+            now = time.time()
+            if now - self._window_start >= self.rate_window:
+                self._window_start, self._used = now, 0
+            allowed = self._used < self.rate_limit
+            if allowed and charge:
+                self._used += 1
+            reset = int(self._window_start + self.rate_window)
+            headers = {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(max(0, self.rate_limit - self._used)),
+                "X-RateLimit-Used": str(self._used),
+                "X-RateLimit-Reset": str(reset),
+                "X-RateLimit-Resource": "core",
+            }
+        return allowed, headers
+
+def _handler(fake: FakeGitHub):
+    repo = fake.repo
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        # ---------- plumbing ----------
+        def _send(self, status: int, body=b"", headers: dict | None = None, content_type="application/json"):
+            if isinstance(body, (dict, list)):
+                body = json.dumps(body).encode("utf-8")
+            if self._unread:
+                # an early error reply: consume the request body so the keep-alive connection stays usable
+                self.rfile.read(self._unread)
+                self._unread = 0
+            self.send_response(status)
+            for k, v in (self._rl_headers | (headers or {})).items():
+                self.send_header(k, v)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+            fake.count("bytes_out", len(body))
+
+        def _json_body(self) -> dict:
+            n, self._unread = self._unread, 0
+            return json.loads(self.rfile.read(n) or b"{}") if n else {}
+
+        def _dispatch(self):
+            url = urlsplit(self.path)
+            parts = [unquote(p) for p in url.path.strip("/").split("/")]
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            self._rl_headers = {}
+            self._unread = int(self.headers.get("Content-Length") or 0)
+
+            if parts[0] == "_stats":
+                return self._send(200, fake.snapshot_stats())
+            if parts[0] == "_reset":
+                fake.reset_stats()
+                return self._send(204)
+
+            delay = fake.latency + fake.random.uniform(-fake.jitter, fake.jitter)
+            if delay > 0:
+                time.sleep(delay / 1000.0)
+
+            if len(parts) < 4 or parts[0] != "repos":
+                return self._send(404, {"message": "Not Found"})
+            rest = parts[3:]
+            route = f"{self.command} {rest[0]}" + (f"/{rest[1]}" if rest[0] == "git" and len(rest) > 1 else "")
+            fake.count("requests", route=route)
+
+            conditional = self.command == "GET" and "If-None-Match" in self.headers
+            allowed, self._rl_headers = fake.take_quota(charge=not conditional)
+            if not allowed:
+                fake.count("rate_limited")
+                return self._send(403, {"message": "API rate limit exceeded"})
+            if fake.random.random() < fake.secondary_rate:
+                fake.count("rate_limited")
+                return self._send(429, {"message": "You have exceeded a secondary rate limit"}, {"Retry-After": "1"})
+            if fake.random.random() < fake.error_rate:
+                fake.count("injected_errors")
+                return self._send(502, {"message": "Server Error"})
+
+            with repo.lock:
+                if rest[0] == "contents":
+                    path = "/".join(rest[1:])
+                    if self.command == "GET":
+                        return self._get_contents(path, query)
+                    if self.command == "PUT":
+                        return self._put_contents(path)
+                if rest[0] == "git" and len(rest) > 1:
+                    return self._git(rest[1], "/".join(rest[2:]), query)
+            return self._send(404, {"message": "Not Found"})
+
+        do_GET = do_PUT = do_POST = do_PATCH = do_DELETE = lambda self: self._dispatch()
+
+        # ---------- contents ----------
+        def _get_contents(self, path: str, query: dict):
+            files = repo.files_at(query.get("ref", fake.branch)) or {}
+            sha = files.get(path)
+            if sha is None:
+                return self._send(404, {"message": "Not Found"})
+            etag = f'"{sha}"'
+            if self.headers.get("If-None-Match") == etag:
+                fake.count("not_modified")
+                return self._send(304, headers={"ETag": etag})
+            data = repo.blobs[sha]
+            if "raw" in (self.headers.get("Accept") or ""):
+                return self._send(200, data, {"ETag": etag}, "application/octet-stream")
+            return self._send(200, {
+                "type": "file", "path": path, "sha": sha, "size": len(data),
+                "encoding": "base64", "content": base64.b64encode(data).decode("ascii"),
+            }, {"ETag": etag})
+
+        def _put_contents(self, path: str):
+            body = self._json_body()
+            branch = body.get("branch") or fake.branch
+            current = (repo.files_at(branch) or {}).get(path)
+            sent = body.get("sha")
+            if current is not None and not sent:
+                fake.count("conflicts")
+                return self._send(422, {"message": '"sha" wasn\'t supplied.'})
+            if sent and sent != current:
+                fake.count("conflicts")
+                return self._send(409, {"message": f"{path} does not match {sent}"})
+            data = base64.b64decode(body.get("content", ""))
+            commit = repo.commit_files({path: data}, body.get("message", ""), branch)
+            return self._send(200 if current else 201, {
+                "content": {"path": path, "sha": _blob_sha(data), "size": len(data)},
+                "commit": {"sha": commit},
+            })
+
+        # ---------- git data ----------
+        def _git(self, kind: str, arg: str, query: dict):
+            if kind == "blobs":
+                if self.command == "POST":
+                    body = self._json_body()
+                    content = body.get("content", "")
+                    data = base64.b64decode(content) if body.get("encoding") == "base64" else content.encode("utf-8")
+                    return self._send(201, {"sha": repo.put_blob(data)})
+                data = repo.blobs.get(arg)
+                if data is None:
+                    return self._send(404, {"message": "Not Found"})
+                if "raw" in (self.headers.get("Accept") or ""):
+                    return self._send(200, data, {"ETag": f'"{arg}"'}, "application/octet-stream")
+                return self._send(200, {"sha": arg, "size": len(data), "encoding": "base64",
+                                        "content": base64.b64encode(data).decode("ascii")})
+
+            if kind in ("ref", "refs") and arg.startswith("heads/"):
+                branch = arg[len("heads/"):]
+                if self.command == "GET":
+                    head = repo.refs.get(branch)
+                    if head is None:
+                        return self._send(404, {"message": "Not Found"})
+                    return self._send(200, {"ref": f"refs/heads/{branch}", "object": {"sha": head, "type": "commit"}})
+                if self.command == "PATCH":
+                    body = self._json_body()
+                    new, head = body.get("sha"), repo.refs.get(branch)
+                    if new not in repo.commits:
+                        return self._send(422, {"message": "Object does not exist"})
+                    if not body.get("force") and head not in repo.commits[new]["parents"]:
+                        fake.count("conflicts")
+                        return self._send(422, {"message": "Update is not a fast forward"})
+                    repo.refs[branch] = new
+                    return self._send(200, {"ref": f"refs/heads/{branch}", "object": {"sha": new, "type": "commit"}})
+
+            if kind == "commits":
+                if self.command == "POST":
+                    body = self._json_body()
+                    sha = repo.put_commit(body["tree"], body.get("parents", []), body.get("message", ""))
+                    return self._send(201, {"sha": sha, "tree": {"sha": body["tree"]}, "parents": [{"sha": p} for p in body.get("parents", [])]})
+                commit = repo.commits.get(arg)
+                if commit is None:
+                    return self._send(404, {"message": "Not Found"})
+                return self._send(200, {"sha": arg, "tree": {"sha": commit["tree"]}, "message": commit["message"],
+                                        "parents": [{"sha": p} for p in commit["parents"]]})
+
+            if kind == "trees":
+                if self.command == "POST":
+                    body = self._json_body()
+                    files = dict(repo.trees.get(body.get("base_tree"), {}))
+                    for entry in body.get("tree", []):
+                        if entry.get("sha") is None:
+                            files.pop(entry["path"], None)
+                        else:
+                            files[entry["path"]] = entry["sha"]
+                    return self._send(201, {"sha": repo.put_tree(files)})
+                return self._get_tree(arg, query)
+
+            return self._send(404, {"message": "Not Found"})
+
+        def _get_tree(self, arg: str, query: dict):
+            ref, _, directory = arg.partition(":")
+            files = repo.files_at(ref)
+            if files is None:
+                return self._send(404, {"message": "Not Found"})
+            prefix = f"{directory.strip('/')}/" if directory.strip("/") else ""
+            below = {p[len(prefix):]: s for p, s in files.items() if p.startswith(prefix)}
+            if prefix and not below:
+                return self._send(404, {"message": "Not Found"})
+            entries, subdirs = [], {}
+            for rel, sha in sorted(below.items()):
+                if "/" in rel and query.get("recursive") not in ("1", "true"):
+                    top = rel.split("/", 1)[0]
+                    subdirs.setdefault(top, {})[rel] = sha
+                    continue
+                entries.append({"path": rel, "mode": "100644", "type": "blob", "sha": sha, "size": len(repo.blobs[sha])})
+            for top, sub in subdirs.items():
+                entries.append({"path": top, "mode": "040000", "type": "tree", "sha": _obj_sha("tree", sub)})
+            sha = _obj_sha("tree", below)
+            etag = f'"{sha}"'
+            if self.headers.get("If-None-Match") == etag:
+                fake.count("not_modified")
+                return self._send(304, headers={"ETag": etag})
+            return self._send(200, {"sha": sha, "tree": entries, "truncated": False}, {"ETag": etag})
+
+    return Handler
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--branch", default="main")
+    ap.add_argument("--seed-dir", help="commit <seed-dir>/data/** as the starting state")
+    ap.add_argument("--latency", type=float, default=0.0, help="ms added to every API request")
+    ap.add_argument("--jitter", type=float, default=0.0, help="± ms of uniform noise on the latency")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 502")
+    ap.add_argument("--secondary-rate", type=float, default=0.0, help="fraction answered with 429 + Retry-After")
+    ap.add_argument("--rate-limit", type=int, default=5000, help="requests per window")
+    ap.add_argument("--rate-window", type=float, default=3600.0, help="seconds")
+    args = ap.parse_args()
+
+    fake = FakeGitHub(args.host, args.port, args.branch, args.latency, args.jitter, args.error_rate,
+                      args.secondary_rate, args.rate_limit, args.rate_window)
+    if args.seed_dir:
+        fake.repo.seed(args.seed_dir, args.branch)
+    print(f"Fake GitHub API on {fake.url} (branch {args.branch}); GET {fake.url}/_stats for counters")
+    try:
+        fake.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
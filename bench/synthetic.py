@@ -0,0 +1,123 @@
+"""
+Synthetic event-ops data at any scale, shaped like the real CSVs.
+
+    python -m bench.synthetic --events 2000 --tasks 50000 --out /tmp/ops
+"""
+import argparse
+import os
+import uuid
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from lib.schema import EVENT_STATUS, TASK_STATUS, columns
+
+CITIES = [
+    ("Songkhla, Thailand", "HDY"), ("Sanya, China", "SYX"), ("Pingtung, Chinese Taipei", "KHH"),
+    ("Hamedan, Iran", "IKA"), ("Manila, Philippines", "MNL"), ("Bali, Indonesia", "DPS"),
+    ("Tokyo, Japan", "HND"), ("Busan, South Korea", "PUS"), ("Sydney, Australia", "SYD"),
+    ("Doha, Qatar", "DOH"), ("Almaty, Kazakhstan", "ALA"), ("Colombo, Sri Lanka", "CMB"),
+]
+EVENT_KINDS = ["AVC Beach Tour {} Open", "Asian U{} Beach Championships", "Asian Beach Games {}", "Continental Cup {}"]
+OWNERS = ["AVC", "AVC Beach Committee", "TD", "Referee Delegate", "Organiser", "Media", "Medical", "Finance"]
+CATEGORIES = ["Entries", "Travel", "Accreditation", "Referees", "Venue", "Media", "Finance", ""]
+PRIORITIES = ["", "", "Top", "High", "Normal", "Low"]
+TASK_NAMES = [
+    "Registration deadline", "Confirmed entry list", "Send accreditation addresses", "Book referee flights",
+    "Confirm hotel allocation", "Publish competition schedule", "Collect visa letters", "Prepare technical meeting",
+    "Send prize money breakdown", "Approve broadcast plan", "Confirm medical staff", "Upload final results",
+]
+
+def _days(base: date, offsets: np.ndarray) -> pd.Series:
+    return pd.Series(pd.to_datetime(base) + pd.to_timedelta(offsets, unit="D")).dt.strftime("%Y-%m-%d")
+
+def make_events(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    start_off = rng.integers(0, 4 * 365, n)
+    length = rng.integers(2, 8, n)
+    city = rng.integers(0, len(CITIES), n)
+    kind = rng.integers(0, len(EVENT_KINDS), n)
+    start = _days(date(2024, 1, 1), start_off)
+    ids = [str(uuid.UUID(bytes=rng.bytes(16), version=4)) for _ in range(n)]
+    return pd.DataFrame({
+        "event_id": ids,
+        "season": pd.to_datetime(start).dt.year.astype(str),
+        "start_date": start,
+        "end_date": _days(date(2024, 1, 1), start_off + length),
+        "event_name": [EVENT_KINDS[k].format(i + 1) for i, k in enumerate(kind)],
+        "location": [CITIES[c][0] for c in city],
+        "destination_airport": [CITIES[c][1] for c in city],
+        "arrival_date": _days(date(2024, 1, 1), start_off - 2),
+        "departure_date": _days(date(2024, 1, 1), start_off + length + 1),
+        "requires_availability": rng.choice(["Yes", "No"], n),
+        "arrival_date_td": _days(date(2024, 1, 1), start_off - 3),
+        "arrival_date_ref": _days(date(2024, 1, 1), start_off - 2),
+        "status": rng.choice(EVENT_STATUS, n),
+    })[columns("data/events.csv")]
+
+def make_tasks(n: int, events: pd.DataFrame, seed: int = 0, general_share: float = 0.15) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + 1)
+    general = rng.random(n) < general_share
+    ev = rng.integers(0, len(events), n)
+    ev_start = pd.to_datetime(events["start_date"]).to_numpy()[ev]
+    due = pd.Series(ev_start - pd.to_timedelta(rng.integers(0, 60, n), unit="D"))
+    due[general] = pd.Timestamp(2024, 1, 1) + pd.to_timedelta(rng.integers(0, 4 * 365, int(general.sum())), unit="D")
+    due_s = due.dt.strftime("%Y-%m-%d")
+    due_s[rng.random(n) < 0.02] = ""          # some tasks have no due date yet
+    notes = np.where(rng.random(n) < 0.2, "Follow up with organiser", "")
+    return pd.DataFrame({
+        "task_id": np.arange(1, n + 1).astype(str),
+        "scope": np.where(general, "General", "Event"),
+        "event_id": np.where(general, "", events["event_id"].to_numpy()[ev]),
+        "task_name": np.array(TASK_NAMES)[rng.integers(0, len(TASK_NAMES), n)],
+        "due_date": due_s.to_numpy(),
+        "owner": rng.choice(OWNERS, n),
+        "status": rng.choice(TASK_STATUS, n, p=[0.45, 0.2, 0.3, 0.05]),
+        "priority": rng.choice(PRIORITIES, n),
+        "category": rng.choice(CATEGORIES, n),
+        "notes": notes,
+    })[columns("data/tasks.csv")]
+
+def make_templates(n_templates: int = 6, rows_per_template: int = 12, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + 2)
+    rows = []
+    for t in range(n_templates):
+        scope = "General" if t % 3 == 2 else "Event"
+        for _ in range(rows_per_template):
+            rows.append({
+                "template_id": str(len(rows) + 1),
+                "scope": scope,
+                "template_name": f"{scope} template {t + 1}",
+                "task_name": TASK_NAMES[int(rng.integers(0, len(TASK_NAMES)))],
+                "due_offset_days": str(-int(rng.integers(0, 60)) if scope == "Event" else int(rng.integers(0, 30))),
+                "default_owner": OWNERS[int(rng.integers(0, len(OWNERS)))],
+                "category": CATEGORIES[int(rng.integers(0, len(CATEGORIES)))],
+                "priority": PRIORITIES[int(rng.integers(0, len(PRIORITIES)))],
+            })
+    return pd.DataFrame(rows, columns=columns("data/task_templates.csv"))
+
+def write_dataset(root: str, n_events: int, n_tasks: int, seed: int = 0) -> dict:
+    """Write data/events.csv, data/tasks.csv and data/task_templates.csv under root."""
+    events = make_events(n_events, seed)
+    tables = {
+        "data/events.csv": events,
+        "data/tasks.csv": make_tasks(n_tasks, events, seed),
+        "data/task_templates.csv": make_templates(seed=seed),
+    }
+    os.makedirs(os.path.join(root, "data"), exist_ok=True)
+    for path, df in tables.items():
+        df.to_csv(os.path.join(root, path), index=False)
+    return {path: len(df) for path, df in tables.items()}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--events", type=int, default=2000)
+    ap.add_argument("--tasks", type=int, default=50000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", required=True, help="directory; files go to <out>/data/")
+    args = ap.parse_args()
+    print(write_dataset(args.out, args.events, args.tasks, args.seed))
+
+if __name__ == "__main__":
+    main()
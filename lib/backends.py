@@ -0,0 +1,465 @@
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import requests
+
+from lib.config import ROOT, get_secret
+from lib.github_store import (
+    blob_sha, github_commit_files, github_read_blob, github_read_bytes, github_write_text, stale_write_error,
+)
+
+def parse_csv_bytes(data: bytes) -> pd.DataFrame:
+    """Parse straight from the raw bytes (no intermediate str copy)."""
+    if not data.strip():
+        return pd.DataFrame()
+    return pd.read_csv(io.BytesIO(data), dtype=str, encoding="utf-8").fillna("")
+
+READ_CHUNK_ROWS = 50_000
+
+def filter_rows(df: pd.DataFrame, where: dict, columns: list[str] | None = None) -> pd.DataFrame:
+    """Rows of df whose where columns equal the given value (or one of a list of values)."""
+    mask = pd.Series(True, index=df.index)
+    for col, want in where.items():
+        values = [str(v) for v in want] if isinstance(want, (list, tuple, set)) else [str(want)]
+        mask &= df[col].astype(str).isin(values) if col in df.columns else False
+    out = df[mask]
+    if columns is not None:
+        out = out[[c for c in columns if c in out.columns]]
+    return out.reset_index(drop=True)
+
+def _candidate_rows(data: bytes, where: dict) -> bytes | None:
+    """
+    The header plus every record that contains one of the wanted values of the
+    first where column as a substring: a byte-level pre-filter for
+    stream_csv_rows that never tokenizes the other rows. Record boundaries are
+    the newlines outside quotes, so quoted multi-line fields are kept whole.
+    A value with a quote is also looked for in its CSV-escaped form ("" for ").
+    None when there is no non-empty value to look for, or one spans lines.
+    """
+    want = next(iter(where.values()))
+    values = [str(v) for v in want] if isinstance(want, (list, tuple, set)) else [str(want)]
+    if not values or not all(values) or any("\n" in v or "\r" in v for v in values):
+        return None
+    needles = {form.encode("utf-8") for v in values for form in (v, v.replace('"', '""'))}
+    raw = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(raw == 10)
+    if b'"' in data:
+        inside = np.bitwise_xor.accumulate((raw == 34).view(np.uint8))
+        newlines = newlines[inside[newlines] == 0]
+    ends = np.append(newlines, len(data))   # record i spans (ends[i-1], ends[i]]
+    hits = set()
+    for needle in needles:
+        pos = data.find(needle)
+        while pos != -1:
+            hits.add(int(np.searchsorted(ends, pos)))
+            pos = data.find(needle, pos + 1)
+    hits.discard(0)   # the header
+    rows = [data[ends[i - 1] + 1: ends[i]] for i in sorted(hits)]
+    return b"\n".join([data[: ends[0]], *rows, b""])
+
+def stream_csv_rows(data: bytes, where: dict, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    filter_rows over CSV bytes without materialising the whole table: lines
+    that cannot match are dropped before parsing when that is safe, and the
+    rest is parsed READ_CHUNK_ROWS rows at a time, only for the needed columns.
+    """
+    if not data.strip():
+        return pd.DataFrame()
+    if where:
+        data = _candidate_rows(data, where) or data
+    need = None if columns is None else set(columns) | set(where)
+    chunks = pd.read_csv(
+        io.BytesIO(data), dtype=str, encoding="utf-8", chunksize=READ_CHUNK_ROWS,
+        usecols=None if need is None else (lambda c: c in need),
+    )
+    parts = [filter_rows(chunk.fillna(""), where, columns) for chunk in chunks]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+def table_name(path: str) -> str:
+    """data/tasks.csv -> tasks"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+# --------------------------------------------------
+# BACKENDS
+# --------------------------------------------------
+# Every backend stores whole tables addressed by their repo path
+# ("data/tasks.csv") and hands out an opaque version string with each read.
+# write_frame only succeeds if the table is still at that version, otherwise
+# it raises StaleWriteError (lib.github_store), the same contract as the GitHub Contents API.
+# Parsed frames are kept per path and reused while the version is unchanged,
+# so a rerun that finds the same version skips CSV parsing entirely.
+#
+# Backends with supports_text also store plain text files (the change journal,
+# see lib.journal) and can replace several files in one step (write_texts).
+# A missing text file reads as ("", "").
+
+class Backend:
+    name = "base"
+
+    @property
+    def source(self) -> str:
+        """Which store this is, for caches keyed by version that outlive the process."""
+        return self.name
+
+    def __init__(self):
+        self._frames: dict[str, tuple[str, pd.DataFrame]] = {}
+        self._frames_lock = threading.Lock()
+
+    def _frame_for(self, path: str, version: str, build) -> pd.DataFrame:
+        """Return a private copy of the parsed frame for (path, version), building it once."""
+        with self._frames_lock:
+            hit = self._frames.get(path)
+        if hit is not None and hit[0] == version:
+            return hit[1].copy()
+        df = build()
+        with self._frames_lock:
+            self._frames[path] = (version, df)
+        return df.copy()
+
+    def read_frame(self, path: str) -> tuple[pd.DataFrame, str]:
+        raise NotImplementedError
+
+    def frame_at(self, path: str, version: str) -> pd.DataFrame | None:
+        """path as it was at an earlier version, if that is still known (None otherwise)."""
+        with self._frames_lock:
+            hit = self._frames.get(path)
+        return hit[1].copy() if hit is not None and hit[0] == version else None
+
+    def version(self, path: str) -> str:
+        """Current version of path without parsing it."""
+        return self.read_frame(path)[1]
+
+    def read_rows(self, path: str, where: dict, columns: list[str] | None = None) -> tuple[pd.DataFrame, str]:
+        """(filter_rows of path, version); backends override this to avoid parsing the whole table."""
+        df, version = self.read_frame(path)
+        return filter_rows(df, where, columns), version
+
+    def _rows_from_bytes(self, path: str, data: bytes, version: str, where: dict, columns) -> pd.DataFrame:
+        # a frame already parsed for this version is the cheapest index there is
+        with self._frames_lock:
+            hit = self._frames.get(path)
+        if hit is not None and hit[0] == version:
+            return filter_rows(hit[1], where, columns)
+        return stream_csv_rows(data, where, columns)
+
+    def write_frame(self, path: str, df: pd.DataFrame, message: str, version: str | None) -> str:
+        raise NotImplementedError
+
+    supports_text = False
+
+    def read_text(self, path: str) -> tuple[str, str]:
+        raise NotImplementedError
+
+    def write_text(self, path: str, text: str, message: str, version: str | None) -> str:
+        raise NotImplementedError
+
+    def write_texts(self, files: dict, message: str, expected: dict) -> dict[str, str]:
+        """files: {path: text or None to delete}; expected: {path: version}. Returns {path: new version}."""
+        raise NotImplementedError
+
+    def text_at(self, path: str, version: str) -> str | None:
+        """A text file as it was at an earlier version, if that is still known."""
+        return None
+
+class GitHubBackend(Backend):
+    """Today's behaviour: CSV files on a branch, via the Contents API."""
+    name = "github"
+
+    def read_frame(self, path):
+        data, sha = github_read_bytes(path)
+        return self._frame_for(path, sha, lambda: parse_csv_bytes(data)), sha
+
+    def version(self, path):
+        return github_read_bytes(path)[1]
+
+    def read_rows(self, path, where, columns=None):
+        data, sha = github_read_bytes(path)
+        return self._rows_from_bytes(path, data, sha, where, columns), sha
+
+    def frame_at(self, path, version):
+        # every version is a blob on GitHub, so older ones can always be fetched
+        df = super().frame_at(path, version)
+        if df is None and version:
+            df = parse_csv_bytes(github_read_blob(version))
+        return df
+
+    def write_frame(self, path, df, message, version):
+        return self.write_text(path, df.to_csv(index=False), message, version)
+
+    supports_text = True
+
+    def read_text(self, path):
+        try:
+            data, sha = github_read_bytes(path)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return "", ""
+            raise
+        return data.decode("utf-8"), sha
+
+    def write_text(self, path, text, message, version):
+        j = github_write_text(path, text, message, sha=version or None)
+        return (j.get("content") or {}).get("sha", "")
+
+    def write_texts(self, files, message, expected):
+        # one commit for all files, so a reader never sees half of the change
+        j = github_commit_files(files, message, expected={p: v or None for p, v in expected.items()})
+        return {p: j["files"].get(p, "") for p in files}
+
+    def text_at(self, path, version):
+        return github_read_blob(version).decode("utf-8") if version else ""
+
+class LocalBackend(Backend):
+    """
+    CSV files under a local directory (the checked-in data/ folder by default).
+    Versions are git blob SHAs of the file bytes, so they line up with GitHub.
+    """
+    name = "local"
+
+    def __init__(self, root: str):
+        super().__init__()
+        self.root = root
+        self._lock = threading.Lock()
+
+    @property
+    def source(self):
+        return f"local:{os.path.abspath(self.root)}"
+
+    def _full(self, path: str) -> str:
+        return os.path.join(self.root, path)
+
+    def _read_bytes(self, path: str) -> bytes:
+        try:
+            with open(self._full(path), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return b""
+
+    def _check(self, path: str, version: str | None):
+        current = self._read_bytes(path)
+        if current and version != blob_sha(current):
+            raise stale_write_error(path, version)
+
+    def _replace_file(self, path: str, data: bytes | None):
+        full = self._full(path)
+        if data is None:
+            if os.path.exists(full):
+                os.remove(full)
+            return
+        os.makedirs(os.path.dirname(full) or ".", exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(full) or ".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, full)
+
+    def read_frame(self, path):
+        data = self._read_bytes(path)
+        version = blob_sha(data) if data else ""
+        return self._frame_for(path, version, lambda: parse_csv_bytes(data)), version
+
+    def version(self, path):
+        data = self._read_bytes(path)
+        return blob_sha(data) if data else ""
+
+    def read_rows(self, path, where, columns=None):
+        data = self._read_bytes(path)
+        version = blob_sha(data) if data else ""
+        return self._rows_from_bytes(path, data, version, where, columns), version
+
+    def write_frame(self, path, df, message, version):
+        return self.write_text(path, df.to_csv(index=False), message, version)
+
+    supports_text = True
+
+    def read_text(self, path):
+        data = self._read_bytes(path)
+        return data.decode("utf-8"), blob_sha(data) if data else ""
+
+    def write_text(self, path, text, message, version):
+        return self.write_texts({path: text}, message, {path: version})[path]
+
+    def write_texts(self, files, message, expected):
+        encoded = {p: None if t is None else t.encode("utf-8") for p, t in files.items()}
+        with self._lock:
+            for path, version in expected.items():
+                self._check(path, version)
+            for path, data in encoded.items():
+                self._replace_file(path, data)
+        return {p: blob_sha(d) if d else "" for p, d in encoded.items()}
+
+# Secondary indexes per table; columns missing from a table are skipped.
+SQLITE_INDEXES = {
+    "events": ["event_id", "season", "start_date"],
+    "tasks": ["task_id", "event_id", "due_date", "status"],
+    "task_templates": ["template_id", "template_name"],
+    "event_files": ["file_id", "event_id"],
+    "event_reports": ["report_id", "event_id"],
+}
+
+class SQLiteBackend(Backend):
+    """
+    One SQLite table per CSV (all columns TEXT), indexed per SQLITE_INDEXES.
+    A table that does not exist yet is seeded from the CSV of the same path
+    under seed_dir, so a fresh database starts from the checked-in data/.
+    """
+    name = "sqlite"
+
+    def __init__(self, db_path: str, seed_dir: str | None = None):
+        super().__init__()
+        self.db_path = db_path
+        self.seed_dir = seed_dir
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("CREATE TABLE IF NOT EXISTS _versions (tbl TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    @property
+    def source(self):
+        # versions are per-database counters, so "3" here says nothing about "3" elsewhere
+        return f"sqlite:{os.path.abspath(self.db_path)}"
+
+    @contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    @staticmethod
+    def _exists(con, tbl: str) -> bool:
+        row = con.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (tbl,)).fetchone()
+        return row is not None
+
+    @staticmethod
+    def _version(con, tbl: str) -> str:
+        row = con.execute("SELECT version FROM _versions WHERE tbl=?", (tbl,)).fetchone()
+        return str(row[0]) if row else ""
+
+    @staticmethod
+    def _replace(con, tbl: str, df: pd.DataFrame):
+        cols = [str(c) for c in df.columns]
+        existing = [r[1] for r in con.execute(f'PRAGMA table_info("{tbl}")')]
+        if existing != cols:
+            con.execute(f'DROP TABLE IF EXISTS "{tbl}"')
+            col_sql = ", ".join(f'"{c}" TEXT' for c in cols)
+            con.execute(f'CREATE TABLE "{tbl}" ({col_sql})')
+            for c in SQLITE_INDEXES.get(tbl, []):
+                if c in cols:
+                    con.execute(f'CREATE INDEX "ix_{tbl}_{c}" ON "{tbl}" ("{c}")')
+        else:
+            con.execute(f'DELETE FROM "{tbl}"')
+        if cols and len(df):
+            marks = ", ".join("?" for _ in cols)
+            con.executemany(
+                f'INSERT INTO "{tbl}" VALUES ({marks})',
+                df.astype(str).itertuples(index=False, name=None),
+            )
+        con.execute(
+            "INSERT INTO _versions (tbl, version) VALUES (?, 1) "
+            "ON CONFLICT(tbl) DO UPDATE SET version = version + 1",
+            (tbl,),
+        )
+
+    def _seed(self, con, path: str, tbl: str):
+        if not self.seed_dir:
+            return
+        seed = os.path.join(self.seed_dir, path)
+        if not os.path.exists(seed):
+            return
+        with open(seed, "rb") as f:
+            df = parse_csv_bytes(f.read())
+        if df.columns.empty:
+            return
+        self._replace(con, tbl, df)
+
+    def read_frame(self, path):
+        tbl = table_name(path)
+        with self._connect() as con:
+            if not self._exists(con, tbl):
+                con.execute("BEGIN IMMEDIATE")
+                if not self._exists(con, tbl):
+                    self._seed(con, path, tbl)
+            if not self._exists(con, tbl):
+                return pd.DataFrame(), ""
+            version = self._version(con, tbl)
+            df = self._frame_for(
+                path, version,
+                lambda: pd.read_sql_query(f'SELECT * FROM "{tbl}" ORDER BY rowid', con, dtype=str).fillna(""),
+            )
+            return df, version
+
+    def version(self, path):
+        tbl = table_name(path)
+        with self._connect() as con:
+            if self._exists(con, tbl):
+                return self._version(con, tbl)
+        return super().version(path)   # seeds the table first
+
+    def read_rows(self, path, where, columns=None):
+        # a WHERE on the table itself, served by the SQLITE_INDEXES indexes
+        tbl = table_name(path)
+        with self._connect() as con:
+            if not self._exists(con, tbl):
+                return super().read_rows(path, where, columns)   # seeds the table first
+            existing = [r[1] for r in con.execute(f'PRAGMA table_info("{tbl}")')]
+            if any(c not in existing for c in where):
+                return pd.DataFrame(), self._version(con, tbl)
+            select = ", ".join(f'"{c}"' for c in existing if columns is None or c in columns)
+            clauses, params = [], []
+            for col, want in where.items():
+                values = [str(v) for v in want] if isinstance(want, (list, tuple, set)) else [str(want)]
+                clauses.append(f'"{col}" IN ({", ".join("?" for _ in values)})')
+                params += values
+            df = pd.read_sql_query(
+                f'SELECT {select} FROM "{tbl}" WHERE {" AND ".join(clauses) or "1"} ORDER BY rowid',
+                con, params=params, dtype=str,
+            ).fillna("")
+            return df, self._version(con, tbl)
+
+    def write_frame(self, path, df, message, version):
+        tbl = table_name(path)
+        with self._connect() as con:
+            con.execute("BEGIN IMMEDIATE")
+            current = self._version(con, tbl)
+            if current and version != current:
+                raise stale_write_error(path, version)
+            self._replace(con, tbl, df)
+            return self._version(con, tbl)
+
+# --------------------------------------------------
+# SELECTION
+# --------------------------------------------------
+# DATA_BACKEND = github (default) | local | sqlite
+# DATA_DIR         root that repo paths resolve against (default: this checkout)
+# DATA_SQLITE_PATH database file (default: <DATA_DIR>/data/event_ops.sqlite3)
+
+_backends: dict[tuple, Backend] = {}
+_backends_lock = threading.Lock()
+
+def get_backend() -> Backend:
+    kind = str(get_secret("DATA_BACKEND", "github") or "github").strip().lower()
+    root = get_secret("DATA_DIR") or ROOT
+    db_path = get_secret("DATA_SQLITE_PATH") or os.path.join(root, "data", "event_ops.sqlite3")
+    key = (kind, root, db_path)
+
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            if kind == "github":
+                backend = GitHubBackend()
+            elif kind == "local":
+                backend = LocalBackend(root)
+            elif kind == "sqlite":
+                backend = SQLiteBackend(db_path, seed_dir=root)
+            else:
+                raise RuntimeError(f"Unknown DATA_BACKEND {kind!r} (expected github, local or sqlite).")
+            _backends[key] = backend
+        return backend
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from lib.config import ROOT, get_flag, get_secret
+
+try:
+    import fcntl
+except ImportError:   # POSIX only; without it evictions are simply not serialized
+    fcntl = None
+
+# --------------------------------------------------
+# ON-DISK BLOB CACHE
+# --------------------------------------------------
+# File contents downloaded from GitHub are also kept on disk, one file per git
+# blob SHA (<dir>/<sha[:2]>/<sha>), so a restarted or redeployed process gets
+# unchanged CSVs from disk instead of the API. Entries are immutable and
+# written to a temp file then renamed, so readers in other worker processes
+# never see half a file. Each read refreshes the entry's mtime; once the
+# directory outgrows BLOB_CACHE_MAX_BYTES the least recently used entries are
+# removed, under an fcntl lock so processes do not evict at the same time.
+# BLOB_CACHE=0 turns this off; BLOB_CACHE_DIR moves it (default .cache/blobs).
+
+_lock = threading.Lock()
+_state = {"bytes": None}   # this process's estimate of the directory size
+
+def blob_cache_enabled() -> bool:
+    return get_flag("BLOB_CACHE", True)
+
+def blob_cache_dir() -> str:
+    return get_secret("BLOB_CACHE_DIR") or os.path.join(ROOT, ".cache", "blobs")
+
+def _max_bytes() -> int:
+    return int(get_secret("BLOB_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+def _file(sha: str) -> str:
+    return os.path.join(blob_cache_dir(), sha[:2], sha)
+
+def get_blob(sha: str) -> bytes | None:
+    """Cached contents of blob sha, or None."""
+    if not sha or not blob_cache_enabled():
+        return None
+    target = _file(sha)
+    try:
+        with open(target, "rb") as f:
+            data = f.read()
+        os.utime(target)
+    except OSError:
+        return None
+    return data
+
+def put_blob(sha: str, data: bytes):
+    if not sha or not blob_cache_enabled():
+        return
+    target = _file(sha)
+    if len(data) > _max_bytes() or os.path.exists(target):
+        return
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+    except OSError:
+        return   # the cache is only an optimisation
+    with _lock:
+        if _state["bytes"] is not None:
+            _state["bytes"] += len(data)
+        over = _state["bytes"] is None or _state["bytes"] > _max_bytes()
+    if over:
+        evict()
+
+def discard_blob(sha: str):
+    """Drop an entry (e.g. one whose contents do not hash to its name)."""
+    try:
+        os.remove(_file(sha))
+    except OSError:
+        pass
+
+@contextmanager
+def _dir_lock():
+    os.makedirs(blob_cache_dir(), exist_ok=True)
+    with open(os.path.join(blob_cache_dir(), ".lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def evict(max_bytes: int | None = None) -> int:
+    """Remove least recently used entries until the cache fits; returns its size."""
+    limit = _max_bytes() if max_bytes is None else max_bytes
+    root = blob_cache_dir()
+    with _dir_lock():
+        entries = []
+        for sub in os.scandir(root):
+            if not sub.is_dir():
+                continue
+            for e in os.scandir(sub.path):
+                if e.name.endswith(".tmp"):
+                    continue
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, e.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+    with _lock:
+        _state["bytes"] = total
+    return total
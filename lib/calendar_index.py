@@ -0,0 +1,20 @@
+import pandas as pd
+
+def build_day_index(tasks: pd.DataFrame, col: str = "due") -> dict:
+    """
+    {Timestamp: row positions in tasks} for a datetime64 day column, built in one groupby pass.
+    Rows without a day (NaT) are left out. Look-ups are O(1) per calendar
+    cell instead of a boolean scan over every task.
+    """
+    if tasks.empty:
+        return {}
+    return tasks.groupby(col, sort=False).indices
+
+def rows_for_day(tasks: pd.DataFrame, index: dict, day) -> pd.DataFrame:
+    pos = index.get(pd.Timestamp(day))
+    if pos is None:
+        return tasks.iloc[0:0]
+    return tasks.iloc[pos]
+
+def count_for_day(index: dict, day) -> int:
+    return len(index.get(pd.Timestamp(day), ()))
@@ -0,0 +1,22 @@
+import os
+import streamlit as st
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))   # the repo checkout
+
+def get_secret(key: str, default=None):
+    # Streamlit Cloud: st.secrets is most reliable
+    try:
+        if key in st.secrets:
+            return st.secrets[key]
+    except Exception:
+        pass
+    # Fallback: environment variables
+    return os.getenv(key, default)
+
+def get_flag(key: str, default: bool = False) -> bool:
+    v = get_secret(key)
+    if v is None or v == "":
+        return default
+    if isinstance(v, bool):
+        return v
+    return str(v).strip().lower() in ("1", "true", "yes", "on")
@@ -1,6 +1,22 @@
-import io
+import contextvars
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-from lib.github_store import github_read_text, github_write_text
+from lib import instrument
+from lib.backends import filter_rows, get_backend, parse_csv_bytes
+from lib.config import get_flag, get_secret
+from lib.github_store import StaleWriteError, blob_sha, stale_write_error
+from lib.journal import encode, join_version, journal_path, patch_records, patches_columns, replay, split_version
+from lib.merge import MergeConflict, three_way_merge
+from lib.partitions import combined_version, decode_manifest, encode_manifest, manifest_path, shard_for, split
+from lib.snapshots import load_snapshot, save_snapshot
+from lib.schema import PROBLEM_COLS, SCHEMAS, categories, columns as schema_columns, key_column, typed_dates, validate
+from lib.typed import parse_dates, to_categories
+from lib.write_queue import WriteBehindQueue, apply_patches
 
 def ensure_cols(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
     """
@@ -13,16 +29,609 @@ def ensure_cols(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
             df[c] = ""
     return df
 
-def read_csv(path: str, columns: list[str]) -> pd.DataFrame:
-    txt, _ = github_read_text(path)
-    if txt.strip():
-        df = pd.read_csv(io.StringIO(txt), dtype=str).fillna("")
-    else:
-        df = pd.DataFrame()
+# --------------------------------------------------
+# WRITE-BEHIND (optional)
+# --------------------------------------------------
+# WRITE_BEHIND=1 turns patch_rows into an enqueue: edits are shown at once
+# (read_csv overlays them) and committed in batches by a background worker
+# after WRITE_BEHIND_DEBOUNCE seconds of quiet.
+
+_queue: WriteBehindQueue | None = None
+_queue_lock = threading.Lock()
+
+def _write_queue() -> WriteBehindQueue | None:
+    global _queue
+    if not get_flag("WRITE_BEHIND"):
+        return _queue if _queue is not None and _queue.pending() else None
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue(
+                _commit_patches, _store_rebasing, debounce=float(get_secret("WRITE_BEHIND_DEBOUNCE", 3)),
+            )
+        return _queue
+
+def write_behind_enabled() -> bool:
+    return get_flag("WRITE_BEHIND")
+
+def pending_writes() -> dict[str, int]:
+    """{path: rows with unsaved changes}; empty when nothing is waiting."""
+    q = _write_queue()
+    return q.pending() if q is not None else {}
+
+def flush_writes():
+    """Commit everything the write-behind queue is holding, now."""
+    q = _write_queue()
+    if q is not None:
+        q.flush()
+
+def last_write_error() -> str:
+    return _queue.last_error if _queue is not None else ""
+
+# --------------------------------------------------
+# PARTITIONED TABLES (optional)
+# --------------------------------------------------
+# PARTITIONS=1 reads and writes the tables in PARTITIONED as one CSV per
+# routing value (lib.partitions) once tools/partition_tasks.py has created
+# their manifest; without a manifest the single file is used as before.
+# The version of a partitioned table is a hash of the manifest and shard
+# versions, and _layouts remembers which shard versions it stands for, so a
+# save rewrites only the shards whose contents changed (plus the manifest
+# when a shard is added) in one commit. Concurrent saves to different events
+# therefore no longer collide. A new event's shard goes in the directory of
+# its season, looked up in the referenced table. Shards are fetched on their
+# own small pool (SHARD_READ_WORKERS, default 8), not the read_tables one,
+# since read_tables may itself be loading this table.
+# Partitioned tables are not journaled: a shard is already small to rewrite.
+# Run python -m tools.partition_tasks --merge-back before turning the flag
+# off again; until then reads refuse a table that has a manifest, rather than
+# silently falling back to the single file as it was before partitioning.
+
+# table -> (routing column, table the values come from, its column naming the directory)
+PARTITIONED = {"data/tasks.csv": ("event_id", "data/events.csv", "season")}
+_LAYOUTS_KEPT = 64
+
+_layouts: "OrderedDict[str, dict]" = OrderedDict()   # version -> {"manifest", "manifest_sha", "shards": {shard: sha}}
+_combined: dict[str, tuple[str, pd.DataFrame]] = {}  # path -> (version, all shards parsed)
+_layouts_lock = threading.Lock()
+_shard_pool: ThreadPoolExecutor | None = None
+
+def _partition_manifest(path: str) -> tuple[dict, str] | None:
+    """(manifest, its version) when path is read through its partitions, else None."""
+    if path not in PARTITIONED:
+        return None
+    backend = get_backend()
+    if not backend.supports_text:
+        return None
+    text, sha = backend.read_text(manifest_path(path))
+    manifest = decode_manifest(text)
+    if manifest is None:
+        return None
+    if not get_flag("PARTITIONS"):
+        raise RuntimeError(
+            f"{path} is partitioned ({manifest_path(path)}) but PARTITIONS is off. "
+            "Set PARTITIONS=1, or run python -m tools.partition_tasks --merge-back first."
+        )
+    return manifest, sha
+
+def partitioned(path: str) -> bool:
+    return _partition_manifest(path) is not None
+
+def _shard_paths(manifest: dict) -> list[str]:
+    return list(dict.fromkeys(manifest["shards"].values()))
+
+def _remember(manifest: dict, manifest_sha: str, shards: dict[str, str]) -> str:
+    version = combined_version(manifest_sha, shards)
+    with _layouts_lock:
+        _layouts[version] = {"manifest": manifest, "manifest_sha": manifest_sha, "shards": dict(shards)}
+        _layouts.move_to_end(version)
+        while len(_layouts) > _LAYOUTS_KEPT:
+            _layouts.popitem(last=False)
+    return version
+
+def _parse_shards(texts) -> pd.DataFrame:
+    """All shards as one frame, parsed in a single pass per distinct header line."""
+    groups: dict[str, list[str]] = {}
+    for text in texts:
+        header, _, body = text.partition("\n")
+        if header.strip():
+            groups.setdefault(header, []).append(body if not body or body.endswith("\n") else body + "\n")
+    frames = [parse_csv_bytes(f"{header}\n{''.join(bodies)}".encode("utf-8")) for header, bodies in groups.items()]
+    if not frames:
+        return pd.DataFrame()
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True).fillna("")
+
+def _per_shard(fn, shards: list[str]) -> list:
+    """[fn(shard) for shard in shards], run concurrently on the shard pool."""
+    global _shard_pool
+    with _layouts_lock:
+        if _shard_pool is None:
+            _shard_pool = ThreadPoolExecutor(max_workers=int(get_secret("SHARD_READ_WORKERS", 8)),
+                                             thread_name_prefix="shard")
+    origin = instrument.caller()
+    futures = []
+    for shard in shards:
+        ctx = contextvars.copy_context()
+        ctx.run(instrument.set_origin, origin)
+        futures.append(_shard_pool.submit(ctx.run, fn, shard))
+    return [f.result() for f in futures]
+
+def _load_partitioned(path: str, manifest: dict, manifest_sha: str) -> tuple[pd.DataFrame, str]:
+    shards = _shard_paths(manifest)
+    read = _per_shard(get_backend().read_text, shards)
+    texts = [text for text, _ in read]
+    shas = {shard: sha for shard, (_, sha) in zip(shards, read)}
+    version = _remember(manifest, manifest_sha, shas)
+    with _layouts_lock:
+        hit = _combined.get(path)
+    if hit is not None and hit[0] == version:
+        return hit[1].copy(), version
+    df = _parse_shards(texts)
+    with _layouts_lock:
+        _combined[path] = (version, df)
+    return df.copy(), version
+
+def _version_partitioned(path: str, manifest: dict, manifest_sha: str) -> str:
+    shards = _shard_paths(manifest)
+    return _remember(manifest, manifest_sha, dict(zip(shards, _per_shard(get_backend().version, shards))))
+
+def _groups_of(path: str, values: list[str]) -> dict[str, str]:
+    """{routing value: directory name} for new shards of path."""
+    by, table, group_col = PARTITIONED[path]
+    if not values:
+        return {}
+    found = read_rows(table, {by: values}, [by, group_col])
+    return dict(zip(found[by].astype(str).str.strip(), found[group_col]))
+
+def _store_partitioned(path: str, df: pd.DataFrame, message: str, version: str | None) -> str:
+    with _layouts_lock:
+        layout = _layouts.get(version or "")
+    if layout is None:
+        raise stale_write_error(path, version)
+    by = PARTITIONED[path][0]
+    mpath = manifest_path(path)
+    current = layout["manifest"]["shards"]
+    shards = dict(current)
+    parts = split(df, by)
+    groups = _groups_of(path, [v for v in parts if v not in shards])
+
+    texts = {}
+    for value, part in parts.items():
+        if value not in shards:
+            shards[value] = shard_for(path, value, groups.get(value, ""))
+        texts[shards[value]] = part.to_csv(index=False)
+    empty = df.iloc[:0].to_csv(index=False)
+    for shard in current.values():
+        texts.setdefault(shard, empty)   # every row of that value was deleted
+
+    files, expected = {}, {}
+    for shard, text in texts.items():
+        old = layout["shards"].get(shard, "")
+        if blob_sha(text.encode("utf-8")) != old:
+            files[shard], expected[shard] = text, old or None
+    manifest, manifest_sha = layout["manifest"], layout["manifest_sha"]
+    if shards != current:
+        manifest = {**manifest, "shards": shards}
+        files[mpath], expected[mpath] = encode_manifest(manifest), manifest_sha
+    if not files:
+        return version
+
+    new = get_backend().write_texts(files, message, expected)
+    written = {shard: sha for shard, sha in new.items() if shard != mpath}
+    return _remember(manifest, new.get(mpath, manifest_sha), {**layout["shards"], **written})
+
+def _partition_rows(path: str, manifest: dict, manifest_sha: str, where: dict, columns: list[str]) -> tuple[pd.DataFrame, str]:
+    """read_rows for a partitioned table: only the shards where can match are read."""
+    by = PARTITIONED[path][0]
+    if by not in where:
+        df, version = _load_partitioned(path, manifest, manifest_sha)
+        return filter_rows(df, where, columns), version
+    backend = get_backend()
+    values = where[by] if isinstance(where[by], (list, tuple, set, pd.Series)) else [where[by]]
+    frames, shas = [], {}
+    for shard in dict.fromkeys(manifest["shards"].get(str(v).strip()) for v in values):
+        if shard is not None:
+            part, shas[shard] = backend.read_rows(shard, where, columns)
+            frames.append(part)
+    df = pd.concat(frames, ignore_index=True).fillna("") if frames else pd.DataFrame(columns=columns)
+    # the version of the shards that were read, not of the whole table
+    return df, combined_version(manifest_sha, shas)
+
+# --------------------------------------------------
+# CHANGE JOURNAL (optional)
+# --------------------------------------------------
+# JOURNAL=1 makes row edits to the tables in JOURNALED append a few JSON lines
+# to <table>.journal.jsonl (lib.journal) instead of rewriting the whole CSV.
+# Reads replay the journal over the base CSV, and the version of a journaled
+# table is "<base sha>+<journal sha>". Once the journal grows past
+# JOURNAL_MAX_BYTES it is compacted: the replayed table becomes the new base
+# and the journal is emptied, in one commit.
+# Run compact_journal() on each table before turning the flag off again.
+# The sqlite backend has no text files, so journaling is off there.
+
+JOURNALED = ["data/tasks.csv"]
+_EMPTY = "e69de29bb2d1d6434b8b29ae775ad8c2e48c5391"   # git blob SHA of an empty file
+
+def journal_enabled(path: str) -> bool:
+    return path in JOURNALED and get_flag("JOURNAL") and get_backend().supports_text and not partitioned(path)
+
+def _journal_max_bytes() -> int:
+    return int(get_secret("JOURNAL_MAX_BYTES", 256 * 1024))
+
+def _load(path: str) -> tuple[pd.DataFrame, str]:
+    layout = _partition_manifest(path)
+    if layout is not None:
+        return _load_partitioned(path, *layout)
+    backend = get_backend()
+    df, sha = backend.read_frame(path)
+    if not journal_enabled(path):
+        return df, sha
+    text, journal_sha = backend.read_text(journal_path(path))
+    return replay(df, key_column(path), text), join_version(sha, journal_sha)
+
+def _version(path: str) -> str:
+    """The version read_csv would report for path, without parsing anything."""
+    layout = _partition_manifest(path)
+    if layout is not None:
+        return _version_partitioned(path, *layout)
+    backend = get_backend()
+    sha = backend.version(path)
+    if not journal_enabled(path):
+        return sha
+    return join_version(sha, backend.read_text(journal_path(path))[1])
+
+def _store(path: str, df: pd.DataFrame, message: str, version: str | None) -> str:
+    if partitioned(path):
+        return _store_partitioned(path, df, message, version)
+    backend = get_backend()
+    if not journal_enabled(path):
+        return backend.write_frame(path, df, message, version)
+    base, journal = split_version(version)
+    jpath = journal_path(path)
+    text = df.to_csv(index=False)
+    if journal in ("", _EMPTY):
+        # nothing to fold in: a plain write of the base is enough
+        return join_version(backend.write_text(path, text, message, base), journal)
+    new = backend.write_texts({path: text, jpath: ""}, message, expected={path: base, jpath: journal})
+    return join_version(new[path], new[jpath])
+
+def journal_append(path: str, records: list[dict], message: str, version: str | None = None, retries: int = 3,
+                   rekey=None, rebase: bool = True) -> str:
+    """
+    Append records to the journal of path (one small commit) and return the
+    new table version. version is what the caller read, used for the base part.
+    rekey(journal text) -> records, if given, is called on the journal as it
+    is right before each attempt (inserts use it to renumber around ids that
+    were appended since the caller read the table).
+    With rebase=False it raises StaleWriteError instead of appending after
+    entries written since version.
+    Compacts the journal when it has outgrown JOURNAL_MAX_BYTES.
+    """
+    with instrument.timed("data_store", "journal_append", path=path, rows=len(records)):
+        return _journal_append(path, records, message, version, retries if rebase else 1, rekey, rebase)
+
+def _journal_append(path: str, records: list[dict], message: str, version: str | None, retries: int,
+                    rekey=None, rebase: bool = True) -> str:
+    backend = get_backend()
+    jpath = journal_path(path)
+    for attempt in range(retries):
+        text, journal_sha = backend.read_text(jpath)
+        if not rebase and journal_sha != split_version(version)[1]:
+            # (a base rewritten meanwhile is not checked: the version returned
+            # then names the old base, which no read will report again)
+            raise stale_write_error(jpath, version)
+        if rekey is not None:
+            records = rekey(text)
+        text += encode(records)
+        try:
+            new_journal = backend.write_text(jpath, text, message, journal_sha)
+            break
+        except StaleWriteError:
+            if attempt == retries - 1:
+                raise
+    base, _ = split_version(version)
+    new_version = join_version(base or "", new_journal)
+    if len(text.encode("utf-8")) > _journal_max_bytes():
+        try:
+            new_version = compact_journal(path)
+        except StaleWriteError:
+            pass  # someone else wrote meanwhile; the next append compacts
+    return new_version
+
+def journal_base_keys(path: str, version: str | None) -> list[str]:
+    """
+    Keys in the base CSV of journaled path if it is no longer the base of
+    version (a compaction folded journal entries into it since), else [].
+    """
+    base, _ = split_version(version)
+    backend = get_backend()
+    if base and backend.version(path) == base:
+        return []
+    df, _ = backend.read_frame(path)
+    key = key_column(path)
+    return df[key].astype(str).tolist() if key in df.columns else []
+
+def compact_journal(path: str) -> str:
+    """Fold the journal of path into its CSV and empty it. Returns the new version."""
+    df, version = _load(path)
+    return _store(path, df, f"Compact {journal_path(path)}", version)
 
-    df = ensure_cols(df, columns)
+def _commit_patches(path: str, key_col: str, patches: dict, message: str, retries: int = 3) -> str:
+    """Write a batch of row patches as one commit, re-reading on a stale version."""
+    if journal_enabled(path):
+        return journal_append(path, patch_records(patches), message)
+    for attempt in range(retries):
+        df, version = _load(path)
+        df = apply_patches(df, key_col, patches)
+        try:
+            return _store(path, df, message, version)
+        except StaleWriteError:
+            if attempt == retries - 1:
+                raise
+
+# --------------------------------------------------
+# REBASE ON CONFLICT
+# --------------------------------------------------
+# A whole-table write that lost the race is not thrown back at the user:
+# the version it was read at is looked up (parsed-frame cache, or the blob
+# on GitHub), the caller's field changes are three-way merged onto the latest
+# version (lib.merge) and the write is retried, with a short randomized
+# backoff between attempts. Only overlapping edits raise MergeConflict.
+
+def _frame_at(path: str, version: str) -> pd.DataFrame | None:
+    if partitioned(path):
+        # only the combined frame this process last read is kept
+        with _layouts_lock:
+            hit = _combined.get(path)
+        return hit[1].copy() if hit is not None and hit[0] == version else None
+    backend = get_backend()
+    base, journal = split_version(version)
+    if journal is None or not journal_enabled(path):
+        return backend.frame_at(path, version)
+    df = backend.frame_at(path, base)
+    if df is None or journal in ("", _EMPTY):
+        return df
+    text = backend.text_at(journal_path(path), journal)
+    return None if text is None else replay(df, key_column(path), text)
+
+def _backoff(attempt: int):
+    time.sleep(random.uniform(0, 0.1 * 2 ** attempt))
+
+def _store_rebasing(path: str, df: pd.DataFrame, message: str, version: str | None, retries: int = 3) -> str:
+    """_store, rebasing df onto the latest version when version is stale."""
+    for attempt in range(retries + 1):
+        try:
+            return _store(path, df, message, version)
+        except StaleWriteError as e:
+            base = _frame_at(path, version) if version and path in SCHEMAS and attempt < retries else None
+            if base is None:
+                raise
+            _backoff(attempt)
+            with instrument.timed("data_store", "rebase", path=path, rows=len(df)) as io:
+                theirs, latest = _load(path)
+                try:
+                    df, conflicts = three_way_merge(base, df, theirs, key_column(path))
+                except ValueError:
+                    raise e from None
+                io["status"] = "conflict" if len(conflicts) else "merged"
+            if not conflicts.empty:
+                raise MergeConflict(path, conflicts) from None
+            version = latest
+
+# --------------------------------------------------
+# VALIDATION
+# --------------------------------------------------
+# Every version of a table is checked against lib.schema once; the report is
+# kept per path (and travels with read_typed snapshots).
+
+_problems: dict[str, tuple[str, pd.DataFrame]] = {}
+_problems_lock = threading.Lock()
+
+def _check(path: str, sha: str, df: pd.DataFrame):
+    with _problems_lock:
+        hit = _problems.get(path)
+    if hit is None or hit[0] != sha:
+        report = validate(path, df)
+        with _problems_lock:
+            _problems[path] = (sha, report)
+
+def validation_errors(path: str) -> pd.DataFrame:
+    """(row, column, value, problem) for the latest version of path that was read."""
+    with _problems_lock:
+        hit = _problems.get(path)
+    return hit[1].copy() if hit is not None else pd.DataFrame(columns=PROBLEM_COLS)
+
+# --------------------------------------------------
+# READ / WRITE
+# --------------------------------------------------
+def read_csv(path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Read a table as an all-string frame from the configured backend
+    (see lib.backends.get_backend), with every column of its schema
+    (lib.schema) unless columns is given.
+    The version it was read at (blob SHA on GitHub) is kept in
+    df.attrs["sha"] so write_csv can save against exactly that version.
+    """
+    with instrument.timed("data_store", "read_csv", path=path) as io:
+        df, sha = _load(path)
+        q = _write_queue()
+        if q is not None:
+            df = q.overlay(path, df)
+        df = ensure_cols(df, columns or schema_columns(path))
+        _check(path, sha, df)
+        df.attrs["sha"] = sha
+        io["rows"] = len(df)
+    return df
+
+def read_rows(path: str, where: dict, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Only the rows of path whose where columns match ({column: value or list
+    of values}), with only the given columns (default: all of the schema).
+    The backend filters while reading (chunked CSV parsing, the parsed-frame
+    cache, or an indexed SQL query), so the cost follows the size of the
+    result rather than of the table; a partitioned table only reads the
+    shards the routing column selects. attrs["sha"] is the table version
+    (for those shards), as with read_csv; the rows are not validated.
+    """
+    columns = columns or schema_columns(path)
+    with instrument.timed("data_store", "read_rows", path=path) as io:
+        backend = get_backend()
+        key = key_column(path)
+        need = list(dict.fromkeys([key, *where, *columns]))
+        layout = _partition_manifest(path)
+        if layout is not None:
+            df, sha = _partition_rows(path, *layout, where, need)
+        else:
+            df, sha = backend.read_rows(path, where, need)
+        if journal_enabled(path):
+            text, journal_sha = backend.read_text(journal_path(path))
+            if patches_columns(text, where):
+                # an edit may have moved other rows into the selection
+                df = filter_rows(replay(backend.read_frame(path)[0], key, text), where, need)
+            else:
+                df = filter_rows(replay(df, key, text), where, need)
+            sha = join_version(sha, journal_sha)
+        q = _write_queue()
+        if q is not None:
+            df = filter_rows(q.overlay(path, df), where)
+        df = ensure_cols(df, columns)[columns]
+        df.attrs["sha"] = sha
+        io["rows"] = len(df)
+    return df
+
+def write_csv(path: str, df: pd.DataFrame, message: str, sha: str | None = None, rebase: bool = True) -> str:
+    """
+    Save df in a single round trip against the version it was read at.
+    sha defaults to df.attrs["sha"]; pass it explicitly when df was rebuilt
+    (pd.concat, data_editor output) and lost its attrs.
+    If the file changed since then, df's changes are merged onto the latest
+    version and saved (see _store_rebasing); raises MergeConflict (a
+    StaleWriteError) when both sides changed the same fields. With
+    rebase=False it raises StaleWriteError instead, so the saved version is
+    always exactly df (inserts use this to renumber ids themselves).
+    """
+    if sha is None:
+        sha = df.attrs.get("sha")
+    store = _store_rebasing if rebase else _store
+    with instrument.timed("data_store", "write_csv", path=path, rows=len(df)):
+        q = _write_queue()
+        if q is not None:
+            new_sha = q.write_through(path, df, message, sha, store)
+        else:
+            new_sha = store(path, df, message, sha)
+    df.attrs["sha"] = new_sha
+    return new_sha
+
+def patch_rows(path: str, key_col: str, patches: dict, message: str) -> str | None:
+    """
+    Set {key: {col: value}} on the rows whose key_col matches.
+    In write-behind mode this only queues the patch (returns None); otherwise
+    it is one commit against the latest version of the file (a journal append
+    for journaled tables) and returns the new version.
+    """
+    with instrument.timed("data_store", "patch_rows", path=path, rows=len(patches)) as io:
+        if write_behind_enabled():
+            _write_queue().enqueue(path, key_col, patches, message)
+            io["cache"] = "queued"
+            return None
+        return _commit_patches(path, key_col, patches, message)
+
+# --------------------------------------------------
+# TYPED READS
+# --------------------------------------------------
+# Dates are parsed once per (path, version, columns) and the typed frame is
+# reused by every page until the file changes. It is also kept on disk as a
+# columnar snapshot (lib.snapshots), so a fresh process loads it without
+# touching the CSV.
+
+_typed: dict[tuple, tuple[str, pd.DataFrame]] = {}
+_typed_lock = threading.Lock()
+
+def _typed_copy(df: pd.DataFrame, sha: str) -> pd.DataFrame:
+    out = df.copy()
+    out.attrs["sha"] = sha
+    return out
+
+def read_typed(path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    read_csv plus the typed columns its schema declares: dates (e.g.
+    due_date -> due as datetime64; invalid dates are NaT and reported by validation_errors())
+    and categoricals for low-cardinality text.
+    """
+    columns = columns or schema_columns(path)
+    with instrument.timed("data_store", "read_typed", path=path) as io:
+        df, io["cache"] = _read_typed(path, columns)
+        io["rows"] = len(df)
     return df
 
-def write_csv(path: str, df: pd.DataFrame, message: str):
-    csv_text = df.to_csv(index=False)
-    github_write_text(path, csv_text, message)
+def _read_typed(path: str, columns: list[str]) -> tuple[pd.DataFrame, str]:
+    # versions are only unique within one store (SQLite counts 1, 2, ...)
+    source = get_backend().source
+    key = (source, path, tuple(columns))
+    # pending write-behind patches are overlaid per read, so they bypass the caches
+    cacheable = path not in pending_writes()
+
+    if cacheable:
+        sha = _version(path)
+        with _typed_lock:
+            hit = _typed.get(key)
+        if hit is not None and hit[0] == sha:
+            return _typed_copy(hit[1], sha), "memory"
+        snap = load_snapshot(source, path, sha, columns)
+        if snap is not None:
+            df, problems = snap
+            with _typed_lock:
+                _typed[key] = (sha, df)
+            with _problems_lock:
+                _problems[path] = (sha, problems)
+            return _typed_copy(df, sha), "snapshot"
+
+    df = read_csv(path, columns)
+    sha = df.attrs["sha"]
+    df, _ = parse_dates(df, typed_dates(path))
+    df = to_categories(df, categories(path))
+    if cacheable:
+        with _typed_lock:
+            _typed[key] = (sha, df)
+        save_snapshot(source, path, sha, columns, df, validation_errors(path))
+    return _typed_copy(df, sha), "parsed"
+
+# --------------------------------------------------
+# PREFETCH
+# --------------------------------------------------
+# A page declares the tables it needs and read_tables() loads them all at
+# once on a small shared thread pool (READ_WORKERS, default 4), so the page
+# waits for the slowest file instead of the sum of all of them. Each worker
+# runs in a copy of the caller's context, so IO_DEBUG still attributes the
+# reads to the page line that asked for them.
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+def _read_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=int(get_secret("READ_WORKERS", 4)), thread_name_prefix="read")
+        return _pool
+
+def _timed_read(read, path: str) -> pd.DataFrame:
+    t0 = time.perf_counter()
+    df = read(path)
+    df.attrs["load_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return df
+
+def read_tables(paths: list[str] = (), typed: list[str] = ()) -> dict[str, pd.DataFrame]:
+    """
+    {path: frame} for every table in paths (read_csv) and typed (read_typed),
+    fetched concurrently; returns once all are loaded and re-raises the first
+    error. Each frame's attrs["load_ms"] holds its own load time.
+    """
+    jobs = [(read_csv, p) for p in paths] + [(read_typed, p) for p in typed]
+    origin = instrument.caller()
+    with instrument.timed("data_store", "read_tables", path=",".join(p for _, p in jobs)):
+        futures = []
+        for read, path in jobs:
+            ctx = contextvars.copy_context()
+            ctx.run(instrument.set_origin, origin)
+            futures.append(_read_pool().submit(ctx.run, _timed_read, read, path))
+        return {path: f.result() for (_, path), f in zip(jobs, futures)}
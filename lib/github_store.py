@@ -1,25 +1,28 @@
 import base64
-import os
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
 import requests
-import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from lib import instrument
+from lib.blob_cache import discard_blob, get_blob, put_blob
+from lib.config import get_secret
 
 API = "https://api.github.com"
 
-def _get_secret(key: str, default=None):
-    # Streamlit Cloud: st.secrets is most reliable
-    try:
-        if key in st.secrets:
-            return st.secrets[key]
-    except Exception:
-        pass
-    # Fallback: environment variables
-    return os.getenv(key, default)
+def _api() -> str:
+    """API root; GITHUB_API_URL points it elsewhere (e.g. bench/fake_github.py)."""
+    return (get_secret("GITHUB_API_URL") or API).rstrip("/")
 
 def _cfg():
-    token  = _get_secret("GITHUB_TOKEN")  or _get_secret("github_token")
-    owner  = _get_secret("GITHUB_OWNER")  or _get_secret("github_owner")
-    repo   = _get_secret("GITHUB_REPO")   or _get_secret("github_repo")
-    branch = _get_secret("GITHUB_BRANCH") or _get_secret("github_branch") or "main"
+    token  = get_secret("GITHUB_TOKEN")  or get_secret("github_token")
+    owner  = get_secret("GITHUB_OWNER")  or get_secret("github_owner")
+    repo   = get_secret("GITHUB_REPO")   or get_secret("github_repo")
+    branch = get_secret("GITHUB_BRANCH") or get_secret("github_branch") or "main"
 
     if not owner or not repo:
         raise RuntimeError(
@@ -29,51 +32,601 @@ def _cfg():
         )
     return token, owner, repo, branch
 
-def github_read_text(path: str):
-    token, owner, repo, branch = _cfg()
-    url = f"{API}/repos/{owner}/{repo}/contents/{path}?ref={branch}"
-    headers = {"Accept": "application/vnd.github+json"}
+# --------------------------------------------------
+# READ CACHE (conditional GET)
+# --------------------------------------------------
+# Entries are keyed by (owner, repo, branch, path). Within the TTL an entry is
+# served straight from memory; after that it is revalidated with If-None-Match,
+# so an unchanged file costs a 304 instead of a full download.
+# Tunable via secrets/env: GITHUB_CACHE_TTL (seconds), GITHUB_CACHE_MAX_BYTES.
+
+_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "revalidated": 0, "evictions": 0}
+
+def _cache_ttl() -> float:
+    return float(get_secret("GITHUB_CACHE_TTL", 10) or 0)
+
+def _cache_max_bytes() -> int:
+    return int(get_secret("GITHUB_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+def _cache_get(key):
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+        return entry
+
+def _cache_put(key, data: bytes, sha: str, etag):
+    global _cache_bytes
+    size = len(data)
+    limit = _cache_max_bytes()
+    with _cache_lock:
+        old = _cache.pop(key, None)
+        if old is not None:
+            _cache_bytes -= old["size"]
+        if size > limit:
+            return
+        _cache[key] = {"data": data, "sha": sha, "etag": etag, "size": size, "fetched": time.monotonic()}
+        _cache_bytes += size
+        while _cache_bytes > limit and _cache:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= evicted["size"]
+            _cache_stats["evictions"] += 1
+
+def _cache_touch(key):
+    with _cache_lock:
+        if key in _cache:
+            _cache[key]["fetched"] = time.monotonic()
+
+def _count(stat: str):
+    with _cache_lock:
+        _cache_stats[stat] += 1
+
+def cache_stats() -> dict:
+    """Counters for the read cache: hits (no request), revalidated (304), misses (full download)."""
+    with _cache_lock:
+        out = dict(_cache_stats)
+        out["entries"] = len(_cache)
+        out["bytes"] = _cache_bytes
+    return out
+
+def clear_cache():
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+        _manifests.clear()
+
+def invalidate(path: str):
+    global _cache_bytes
+    _, owner, repo, branch = _cfg()
+    with _cache_lock:
+        old = _cache.pop((owner, repo, branch, path), None)
+        if old is not None:
+            _cache_bytes -= old["size"]
+        _manifests.pop((owner, repo, branch, path.rpartition("/")[0]), None)
+
+# --------------------------------------------------
+# TREE MANIFEST
+# --------------------------------------------------
+# For files in the directories listed in GITHUB_SYNC_DIRS (default "data";
+# empty turns this off) or below them, an expired cache entry is not
+# revalidated file by file. Instead one Git Trees request ("<branch>:<dir>",
+# itself conditional on its ETag) returns the blob SHA of every file in the
+# directory (each subdirectory has a manifest of its own), and each
+# file is compared against it: unchanged files are served from the cache,
+# changed ones are read by blob SHA (from lib.blob_cache when a previous
+# process already had them, else downloaded). The manifest is shared by all
+# files of the directory for GITHUB_CACHE_TTL, so a rerun that finds nothing
+# new costs one request however many CSVs the directory holds. A file the
+# manifest does not list is reported missing (a 404) without a request.
+
+_manifests: dict[tuple, dict] = {}   # (owner, repo, branch, dir) -> {"files": {path: sha}, "etag", "fetched"}
+_manifest_locks: dict[tuple, threading.Lock] = {}   # one per manifest, so directories refresh independently
+
+def _sync_dirs() -> set[str]:
+    return {d.strip().strip("/") for d in str(get_secret("GITHUB_SYNC_DIRS", "data")).split(",") if d.strip()}
+
+def _synced(directory: str) -> bool:
+    """directory is listed in GITHUB_SYNC_DIRS or below one that is (each keeps its own manifest)."""
+    return any(directory == d or directory.startswith(d + "/") for d in _sync_dirs())
+
+def tree_manifest(directory: str, max_age: float | None = None) -> dict[str, str]:
+    """{path: blob sha} for the files directly under directory on the branch."""
+    _, owner, repo, branch = _cfg()
+    key = (owner, repo, branch, directory)
+    ttl = _cache_ttl() if max_age is None else max_age
+    with _cache_lock:
+        lock = _manifest_locks.setdefault(key, threading.Lock())
+    with lock:   # concurrent readers of a directory wait for one refresh instead of each sending their own
+        with _cache_lock:
+            entry = _manifests.get(key)
+        if entry is not None and time.monotonic() - entry["fetched"] < ttl:
+            return entry["files"]
+        return _fetch_manifest(key, entry)
+
+def _fetch_manifest(key: tuple, entry: dict | None) -> dict[str, str]:
+    owner, repo, branch, directory = key
+    token = _cfg()[0]
+    with instrument.timed("github", "manifest", path=directory) as io:
+        headers = _headers(token)
+        if entry is not None and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        r = _request("GET", f"{_api()}/repos/{owner}/{repo}/git/trees/{branch}:{directory}", headers=headers)
+        if r.status_code == 304 and entry is not None:
+            io["cache"] = "revalidated"
+            files, etag = entry["files"], entry["etag"]
+        elif r.status_code == 404:
+            io["cache"] = "miss"
+            files, etag = {}, None
+        else:
+            r.raise_for_status()
+            io["cache"] = "miss"
+            prefix = f"{directory}/" if directory else ""
+            files = {prefix + e["path"]: e["sha"] for e in r.json().get("tree", []) if e.get("type") == "blob"}
+            etag = r.headers.get("ETag")
+    with _cache_lock:
+        _manifests[key] = {"files": files, "etag": etag, "fetched": time.monotonic()}
+    return files
+
+def _not_found(path: str) -> requests.HTTPError:
+    """What a Contents GET would raise for a file the manifest says is not there."""
+    r = requests.Response()
+    r.status_code, r.reason, r.url = 404, "Not Found", path
+    return requests.HTTPError(f"404 Client Error: {path} is not on the branch (tree manifest)", response=r)
+
+def _note_manifest(key: tuple, sha: str):
+    """Our own write: keep the manifest entry for the file in step with the cache."""
+    owner, repo, branch, path = key
+    with _cache_lock:
+        entry = _manifests.get((owner, repo, branch, path.rpartition("/")[0]))
+        if entry is not None:
+            entry["files"] = {**entry["files"], path: sha}
+
+# --------------------------------------------------
+# HTTP SESSION + RATE LIMITING
+# --------------------------------------------------
+# One pooled requests.Session per process (keep-alive, up to GITHUB_POOL_SIZE
+# idle connections kept), with urllib3 retries + backoff for 5xx on reads. 403/429 responses that carry
+# Retry-After or an exhausted X-RateLimit-Remaining (primary or secondary
+# rate limit) are waited out and retried a bounded number of times.
+# A client-side token bucket spaces requests out, and slows down to spread
+# whatever quota is left until X-RateLimit-Reset once it runs low.
+# Tunable: GITHUB_POOL_SIZE, GITHUB_MAX_RPS, GITHUB_BURST, GITHUB_RATE_RESERVE.
+
+class RateLimitError(RuntimeError):
+    """GitHub kept rejecting the request for rate limiting after our retries."""
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int, reserve: float):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve       # fraction of the hourly quota we try not to touch
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+        self.limit = None
+        self.remaining = None
+        self.reset = None            # epoch seconds
+        self.throttled_calls = 0
+        self.throttled_seconds = 0.0
+        self.retries = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.requests += 1
+                    return
+                wait = (1 - self.tokens) / self.rate if self.rate > 0 else 1.0
+                self.throttled_calls += 1
+                self.throttled_seconds += wait
+            time.sleep(wait)
+
+    def update(self, headers):
+        try:
+            limit = int(headers["X-RateLimit-Limit"])
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset = int(headers["X-RateLimit-Reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            self.limit, self.remaining, self.reset = limit, remaining, reset
+            headroom = remaining - limit * self.reserve
+            if headroom > limit * self.reserve:
+                self.rate = self.base_rate
+            else:
+                # spread what is left over the rest of the window (never fully stop)
+                window = max(1.0, reset - time.time())
+                self.rate = max(0.05, min(self.base_rate, max(headroom, 0) / window))
+
+    def note_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "reset_in": None if self.reset is None else max(0, int(self.reset - time.time())),
+                "headroom_pct": None if not self.limit else round(100.0 * self.remaining / self.limit, 1),
+                "client_rate": round(self.rate, 3),
+                "throttled_calls": self.throttled_calls,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+                "rate_limit_retries": self.retries,
+                "requests": self.requests,
+            }
+
+_session = None
+_bucket = None
+_http_lock = threading.Lock()
+
+def _http():
+    global _session, _bucket
+    with _http_lock:
+        if _session is None:
+            # only reads are retried blindly; a write that failed with a 5xx may
+            # still have landed, so writes check first (see _write_retry)
+            retry = Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=frozenset({"GET"}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            # pool_block stays off: requests gives urllib3 no pool timeout, so a blocking
+            # pool would wait forever once every connection is busy
+            pool = int(get_secret("GITHUB_POOL_SIZE", 10))
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool, max_retries=retry)
+            s = requests.Session()
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+            _bucket = _TokenBucket(
+                rate=float(get_secret("GITHUB_MAX_RPS", 5)),
+                burst=int(get_secret("GITHUB_BURST", 10)),
+                reserve=float(get_secret("GITHUB_RATE_RESERVE", 0.1)),
+            )
+        return _session, _bucket
+
+def _rate_limited(r) -> bool:
+    if r.status_code not in (403, 429):
+        return False
+    return "Retry-After" in r.headers or r.headers.get("X-RateLimit-Remaining") == "0"
+
+def _request(method: str, url: str, max_waits: int = 2, **kw):
+    session, bucket = _http()
+    kw.setdefault("timeout", 30)
+    for attempt in range(max_waits + 1):
+        bucket.acquire()
+        t0 = time.perf_counter()
+        r = session.request(method, url, **kw)
+        if instrument.active():
+            instrument.record(
+                "http", f"{method} {url.split('/repos/', 1)[-1]}", (time.perf_counter() - t0) * 1000,
+                status=r.status_code, bytes=int(r.headers.get("Content-Length") or 0),
+                sent=len(r.request.body or b""),
+            )
+        bucket.update(r.headers)
+        if not _rate_limited(r):
+            return r
+        r.close()   # hand the connection back before waiting
+        if attempt == max_waits:
+            break
+        if "Retry-After" in r.headers:
+            wait = float(r.headers["Retry-After"])
+        else:
+            wait = float(r.headers.get("X-RateLimit-Reset", time.time() + 60)) - time.time()
+        wait = min(max(wait, 1.0), 60.0)
+        bucket.note_retry()
+        time.sleep(wait)
+    raise RateLimitError(
+        f"GitHub rate limit hit ({r.status_code}); "
+        f"remaining={r.headers.get('X-RateLimit-Remaining')}, "
+        f"resets at {r.headers.get('X-RateLimit-Reset')}. Try again shortly."
+    )
+
+WRITE_RETRIES = 3
+
+def _write_retry(attempt: int, r) -> bool:
+    """True (after a backoff) if a write that got a server error may be tried again."""
+    if r.status_code < 500 or attempt >= WRITE_RETRIES - 1:
+        return False
+    time.sleep(0.5 * 2 ** attempt)
+    return True
+
+def _post_object(url: str, headers: dict, payload: dict):
+    """POST a git object (blob, tree, commit). Creating one twice is harmless, so 5xx is retried."""
+    for attempt in range(WRITE_RETRIES):
+        r = _request("POST", url, headers=headers, json=payload)
+        if not _write_retry(attempt, r):
+            return r
+
+def rate_limit_stats() -> dict:
+    """Last seen GitHub quota (limit / remaining / reset_in / headroom_pct), client-side throttling and requests sent."""
+    return _http()[1].stats()
+
+# --------------------------------------------------
+# READ / WRITE
+# --------------------------------------------------
+def blob_sha(data: bytes) -> str:
+    """Git blob SHA of data: the same id GitHub reports for the file."""
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)   # no header + data copy of a large file
+    return h.hexdigest()
+
+def _headers(token, accept: str = "application/vnd.github+json") -> dict:
+    headers = {"Accept": accept}
     if token:
         headers["Authorization"] = f"token {token}"
+    return headers
 
-    r = requests.get(url, headers=headers, timeout=30)
-    r.raise_for_status()
-    j = r.json()
+def _read_body(r) -> bytes:
+    buf = bytearray()
+    for chunk in r.iter_content(chunk_size=1 << 16):
+        buf += chunk
+    return bytes(buf)
+
+def github_read_bytes(path: str, max_age: float | None = None):
+    """
+    Return (bytes, sha) for a file on the branch.
+    Uses the raw media type, so there is no JSON/base64 overhead and files up
+    to 100 MB work (the default JSON response stops inlining content at 1 MB).
+    The sha is the git blob SHA, computed locally from the bytes.
+    max_age overrides the cache TTL; 0 always revalidates.
+    """
+    with instrument.timed("github", "read", path=path) as io:
+        data, sha, io["cache"] = _read_bytes_cached(path, max_age)
+        io["bytes"] = len(data)
+    return data, sha
+
+def _read_bytes_cached(path: str, max_age: float | None):
+    token, owner, repo, branch = _cfg()
+    key = (owner, repo, branch, path)
+    ttl = _cache_ttl() if max_age is None else max_age
+
+    cached = _cache_get(key)
+    if cached is not None and time.monotonic() - cached["fetched"] < ttl:
+        _count("hits")
+        return cached["data"], cached["sha"], "hit"
 
-    content = j.get("content", "")
-    sha = j.get("sha", "")
-    if not content:
-        return "", sha
+    directory = path.rpartition("/")[0]
+    if _synced(directory):
+        sha = tree_manifest(directory, max_age).get(path)
+        if sha is not None and cached is not None and cached["sha"] == sha:
+            _count("hits")
+            _cache_touch(key)
+            return cached["data"], cached["sha"], "manifest"
+        if sha is None:
+            # the manifest lists every file of the directory, so this one does not exist
+            # (our own writes update it): no request, and none again until it expires
+            raise _not_found(path)
+        data, source = _read_blob(sha)
+        _count("misses")
+        _cache_put(key, data, sha, None)
+        return data, sha, source
 
-    txt = base64.b64decode(content).decode("utf-8")
-    return txt, sha
+    url = f"{_api()}/repos/{owner}/{repo}/contents/{path}?ref={branch}"
+    headers = _headers(token, "application/vnd.github.raw")
+    if cached is not None and cached["etag"]:
+        headers["If-None-Match"] = cached["etag"]
 
-def github_write_text(path: str, text: str, message: str):
+    # a streamed response holds its pooled connection until closed, on every path
+    with _request("GET", url, headers=headers, stream=True) as r:
+        if r.status_code == 304 and cached is not None:
+            _count("revalidated")
+            _cache_touch(key)
+            return cached["data"], cached["sha"], "revalidated"
+        r.raise_for_status()
+        _count("misses")
+        data = _read_body(r)
+        etag = r.headers.get("ETag")
+    sha = blob_sha(data)
+    _cache_put(key, data, sha, etag)
+    put_blob(sha, data)
+    return data, sha, "miss"
+
+def github_read_text(path: str, max_age: float | None = None):
+    """Return (text, sha); see github_read_bytes."""
+    data, sha = github_read_bytes(path, max_age=max_age)
+    return data.decode("utf-8"), sha
+
+def github_read_blob(sha: str) -> bytes:
+    """Raw bytes of a blob by SHA (on-disk blob cache, else Git Data API, up to 100 MB)."""
+    return _read_blob(sha)[0]
+
+def _read_blob(sha: str) -> tuple[bytes, str]:
+    data = get_blob(sha)
+    if data is not None:
+        if blob_sha(data) == sha:
+            return data, "disk"
+        discard_blob(sha)
+    token, owner, repo, _ = _cfg()
+    url = f"{_api()}/repos/{owner}/{repo}/git/blobs/{sha}"
+    with _request("GET", url, headers=_headers(token, "application/vnd.github.raw"), stream=True) as r:
+        r.raise_for_status()
+        data = _read_body(r)
+    put_blob(sha, data)
+    return data, "blob"
+
+class StaleWriteError(RuntimeError):
+    """The file changed on the branch since the SHA the caller read it at."""
+
+def stale_write_error(path: str, sha: str | None) -> StaleWriteError:
+    return StaleWriteError(
+        f"{path} was changed by someone else since it was loaded "
+        f"(read at {sha or 'no version'}). Reload the page and try again."
+    )
+
+def _write_token():
     token, owner, repo, branch = _cfg()
     if not token:
         raise RuntimeError("Missing GITHUB_TOKEN (set in Streamlit Secrets).")
+    return token, owner, repo, branch
 
-    # get sha if file exists
-    sha = None
-    try:
-        _, sha = github_read_text(path)
-    except Exception:
-        sha = None
-
-    url = f"{API}/repos/{owner}/{repo}/contents/{path}"
-    headers = {
-        "Accept": "application/vnd.github+json",
-        "Authorization": f"token {token}",
-    }
+def _contents_max_bytes() -> int:
+    return int(get_secret("GITHUB_CONTENTS_MAX_BYTES", 1024 * 1024))
 
+def github_write_text(path: str, text: str, message: str, sha: str | None = None):
+    """
+    Save the file using the blob SHA it was read at (no extra read).
+    sha=None means "create": GitHub rejects it if the file already exists.
+    Raises StaleWriteError when the branch moved on since that SHA.
+
+    Files up to GITHUB_CONTENTS_MAX_BYTES go through one Contents API PUT;
+    bigger ones through the blob/tree API (github_commit_files), which has
+    no practical size limit.
+    """
+    with instrument.timed("github", "write", path=path, bytes=len(text)):
+        return _put_text(path, text, message, sha)
+
+def _put_text(path: str, text: str, message: str, sha: str | None):
+    data = text.encode("utf-8")
+    if len(data) > _contents_max_bytes():
+        j = github_commit_files({path: text}, message, expected={path: sha})
+        return {"content": {"sha": j["files"][path]}, "commit": j["commit"]}
+
+    token, owner, repo, branch = _write_token()
+    url = f"{_api()}/repos/{owner}/{repo}/contents/{path}"
     payload = {
         "message": message,
-        "content": base64.b64encode(text.encode("utf-8")).decode("utf-8"),
+        "content": base64.b64encode(data).decode("utf-8"),
         "branch": branch,
     }
     if sha:
         payload["sha"] = sha
 
-    r = requests.put(url, headers=headers, json=payload, timeout=30)
+    for attempt in range(WRITE_RETRIES):
+        r = _request("PUT", url, headers=_headers(token), json=payload)
+        if r.status_code < 500:
+            break
+        # the commit may have landed before the error: look before sending it again
+        current = _tree_entries(f"{_api()}/repos/{owner}/{repo}", token, branch, branch, path.rpartition("/")[0]).get(path)
+        if current == blob_sha(data):
+            r = None
+            break
+        if (current or None) != (sha or None):
+            invalidate(path)
+            raise stale_write_error(path, sha)
+        if not _write_retry(attempt, r):
+            break
+    if r is None:
+        j = {"content": {"sha": blob_sha(data)}, "commit": {}}
+    else:
+        if not r.ok:
+            invalidate(path)
+        # 409: sha does not match the branch head; 422: file exists but no sha was sent
+        if r.status_code in (409, 422):
+            raise stale_write_error(path, sha)
+        r.raise_for_status()
+        j = r.json()
+
+    # write-through: the new bytes are what any reader in this process should see next
+    new_sha = (j.get("content") or {}).get("sha", "")
+    _cache_put((owner, repo, branch, path), data, new_sha, None)
+    _note_manifest((owner, repo, branch, path), new_sha)
+    put_blob(new_sha, data)
+    return j
+
+def _ref_sha(base: str, headers: dict, branch: str) -> str:
+    r = _request("GET", f"{base}/git/ref/heads/{branch}", headers=headers)
+    r.raise_for_status()
+    return r.json()["object"]["sha"]
+
+def _tree_entries(base: str, token, head: str, tree_sha: str, directory: str) -> dict:
+    """{path: blob sha} for the files directly under directory at commit head."""
+    ref = f"{head}:{directory}" if directory else tree_sha
+    r = _request("GET", f"{base}/git/trees/{ref}", headers=_headers(token))
+    if r.status_code == 404:
+        return {}
     r.raise_for_status()
-    return r.json()
+    prefix = f"{directory}/" if directory else ""
+    return {prefix + e["path"]: e["sha"] for e in r.json().get("tree", []) if e.get("type") == "blob"}
+
+def github_commit_files(files: dict, message: str, expected: dict | None = None, retries: int = 3) -> dict:
+    """
+    Write several files in ONE commit through the Git Data API.
+
+    files:    {path: text, or None to delete the file}
+    expected: {path: blob sha the caller read, or None for "must not exist"};
+              paths left out are written unconditionally.
+    Returns {"commit": {"sha": ...}, "files": {path: new blob sha}}.
+    Raises StaleWriteError if an expected path changed; a concurrent commit
+    to other files just makes us rebuild on top of it.
+    """
+    with instrument.timed("github", "commit_files", path=",".join(files),
+                          bytes=sum(len(t) for t in files.values() if t is not None)):
+        return _commit_files(files, message, expected or {}, retries)
+
+def _commit_files(files: dict, message: str, expected: dict, retries: int) -> dict:
+    token, owner, repo, branch = _write_token()
+    base = f"{_api()}/repos/{owner}/{repo}"
+    headers = _headers(token)
+
+    blobs = {}
+    for path, text in files.items():
+        if text is None:
+            continue
+        r = _post_object(f"{base}/git/blobs", headers, {"content": text, "encoding": "utf-8"})
+        r.raise_for_status()
+        blobs[path] = r.json()["sha"]
+
+    for attempt in range(retries):
+        head = _ref_sha(base, headers, branch)
+        r = _request("GET", f"{base}/git/commits/{head}", headers=headers)
+        r.raise_for_status()
+        tree_sha = r.json()["tree"]["sha"]
+
+        if expected:
+            current = {}
+            for directory in sorted({p.rpartition("/")[0] for p in expected}):
+                current.update(_tree_entries(base, token, head, tree_sha, directory))
+            for path, sha in expected.items():
+                if (current.get(path) or None) != (sha or None):
+                    invalidate(path)
+                    raise stale_write_error(path, sha)
+
+        tree = [
+            {"path": p, "mode": "100644", "type": "blob", "sha": blobs.get(p)}
+            for p in files
+        ]
+        r = _post_object(f"{base}/git/trees", headers, {"base_tree": tree_sha, "tree": tree})
+        r.raise_for_status()
+        r = _post_object(f"{base}/git/commits", headers,
+                         {"message": message, "tree": r.json()["sha"], "parents": [head]})
+        r.raise_for_status()
+        commit = r.json()
+
+        r = _request("PATCH", f"{base}/git/refs/heads/{branch}", headers=headers,
+                     json={"sha": commit["sha"], "force": False})
+        if r.status_code >= 500:
+            if _ref_sha(base, headers, branch) == commit["sha"]:
+                break   # the update landed before the error
+            if _write_retry(attempt, r) and attempt < retries - 1:
+                continue   # not applied: rebuild on whatever the head is now
+        if r.status_code == 422 and attempt < retries - 1:
+            continue  # branch moved while we were building: rebase onto the new head
+        if r.status_code == 422:
+            raise StaleWriteError(f"{branch} kept moving while committing {', '.join(files)}. Try again.")
+        r.raise_for_status()
+        break
+
+    for path, text in files.items():
+        if text is None:
+            invalidate(path)
+        else:
+            data = text.encode("utf-8")
+            _cache_put((owner, repo, branch, path), data, blobs[path], None)
+            _note_manifest((owner, repo, branch, path), blobs[path])
+            put_blob(blobs[path], data)
+    return {"commit": {"sha": commit["sha"]}, "files": blobs}
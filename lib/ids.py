@@ -0,0 +1,75 @@
+import threading
+
+import pandas as pd
+
+from lib.schema import key_column
+
+# --------------------------------------------------
+# ID ALLOCATION
+# --------------------------------------------------
+# Numeric keys (task_id, template_id) are handed out from a high-water mark
+# kept per table. The mark is learned from the key column once per table
+# version and afterwards only moves up: reserve_ids() takes a consecutive
+# range under a lock, so sessions of the same process never get the same id
+# and an insert does not rescan the table. Another process (or a stale read)
+# can still pick the same numbers; writers call resolve_collisions() against
+# the ids present at write time and renumber only the rows that clash.
+
+_marks: dict[str, dict] = {}    # path -> {"version": table version last scanned, "next": next free id}
+_lock = threading.Lock()
+
+def _highest(ids) -> int:
+    s = pd.to_numeric(pd.Series(list(ids), dtype=object), errors="coerce").dropna()
+    return int(s.max()) if not s.empty else 0
+
+def _raise_mark(path: str, highest: int, version: str | None = None):
+    with _lock:
+        mark = _marks.setdefault(path, {"version": None, "next": 1})
+        mark["next"] = max(mark["next"], highest + 1)
+        if version is not None:
+            mark["version"] = version
+
+def observe(path: str, df: pd.DataFrame, key: str | None = None):
+    """Make sure the mark for path is above every id in df (a no-op for a version already seen)."""
+    key = key or key_column(path)
+    version = df.attrs.get("sha") or ""
+    with _lock:
+        mark = _marks.get(path)
+        if mark is not None and version and mark["version"] == version:
+            return
+    _raise_mark(path, _highest(df[key]) if key in df.columns else 0, version or None)
+
+def note_version(path: str, version: str):
+    """
+    Record that version (typically the result of our own write) holds no id
+    at or above the mark, so reading it back does not trigger a rescan.
+    """
+    _raise_mark(path, 0, version)
+
+def _take(path: str, n: int) -> list[str]:
+    with _lock:
+        mark = _marks[path]
+        first = mark["next"]
+        mark["next"] += n
+    return [str(i) for i in range(first, first + n)]
+
+def reserve_ids(path: str, df: pd.DataFrame, n: int, key: str | None = None) -> list[str]:
+    """n consecutive unused ids for path; df is the table as last read."""
+    observe(path, df, key)
+    return _take(path, n)
+
+def resolve_collisions(path: str, rows: pd.DataFrame, taken, key: str | None = None) -> pd.DataFrame:
+    """
+    rows with a fresh id wherever its key is already in taken (ids found in
+    the table at write time). Rows that do not clash keep their ids; the mark
+    moves above taken either way.
+    """
+    key = key or key_column(path)
+    taken = set(taken)
+    _raise_mark(path, _highest(taken))
+    clash = rows[key].astype(str).isin(taken).to_numpy()
+    if not clash.any():
+        return rows
+    rows = rows.copy()
+    rows.loc[clash, key] = _take(path, int(clash.sum()))
+    return rows
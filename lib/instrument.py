@@ -0,0 +1,155 @@
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from lib.config import get_flag, get_secret
+
+# --------------------------------------------------
+# PER-RERUN I/O INSTRUMENTATION (optional)
+# --------------------------------------------------
+# IO_DEBUG=1 makes every page record what its rerun did: each data_store call
+# and each GitHub request, with duration, bytes, cache status and the page
+# line that triggered it. start_rerun() opens the record at the top of a page;
+# finish_rerun() closes it, returns the aggregate and, with IO_LOG_PATH set,
+# appends it as one JSON line. A rerun cut short by st.rerun() (every save
+# ends in one) never reaches finish_rerun(); the caller keeps the record
+# start_rerun() returned and closes it at the start of the next rerun, marked
+# "interrupted". With the flag off, record() is a no-op.
+# Work done on other threads is only attributed when it runs in a copy of the
+# page's context (read_tables does this; the write-behind worker does not).
+
+_current: contextvars.ContextVar = contextvars.ContextVar("io_rerun", default=None)
+_origin: contextvars.ContextVar = contextvars.ContextVar("io_origin", default="")
+_log_lock = threading.Lock()
+_LIB = os.path.dirname(os.path.abspath(__file__))
+
+def enabled() -> bool:
+    return get_flag("IO_DEBUG")
+
+def active() -> bool:
+    return _current.get() is not None
+
+def start_rerun(page: str) -> dict | None:
+    """
+    Begin recording for this rerun of page (no-op unless IO_DEBUG). Returns
+    the record, for finish_rerun(run) should this rerun never get there.
+    """
+    if not enabled():
+        _current.set(None)
+        return None
+    t0 = time.perf_counter()
+    run = {
+        "page": page,
+        "started": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "t0": t0,
+        "last": t0,
+        "events": [],
+    }
+    _current.set(run)
+    return run
+
+def set_origin(caller: str):
+    """Attribute what this context records to caller (for work handed to another thread)."""
+    _origin.set(caller)
+
+def caller() -> str:
+    """The page line behind the current call, for set_origin in a worker."""
+    return _caller(1) if active() else ""
+
+def _caller(depth: int = 2) -> str:
+    """First frame outside lib/: the page line (or widget callback) behind the call."""
+    if _origin.get():
+        return _origin.get()
+    f = sys._getframe(depth)
+    while f is not None:
+        path = os.path.abspath(f.f_code.co_filename)
+        if not path.startswith(_LIB) and "contextlib" not in path:
+            return f"{os.path.basename(path)}:{f.f_lineno}"
+        f = f.f_back
+    return ""
+
+def record(kind: str, name: str, ms: float, **fields):
+    run = _current.get()
+    if run is None:
+        return
+    event = {"kind": kind, "name": name, "ms": round(ms, 3), "caller": _caller()}
+    event.update({k: v for k, v in fields.items() if v not in (None, "")})
+    run["events"].append(event)
+    run["last"] = time.perf_counter()
+
+@contextmanager
+def timed(kind: str, name: str, **fields):
+    """
+    Record the duration of the block. The yielded dict can be filled in with
+    more fields (bytes, cache, status, rows, ...) before the block ends.
+    """
+    if _current.get() is None:
+        yield fields
+        return
+    t0 = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        record(kind, name, (time.perf_counter() - t0) * 1000, **fields)
+
+def summarize(run: dict, end: float | None = None) -> dict:
+    events = run["events"]
+    http = [e for e in events if e["kind"] == "http"]
+    calls: dict[str, dict] = {}
+    for e in events:
+        if e["kind"] == "http":
+            continue
+        c = calls.setdefault(f"{e['kind']}.{e['name']}", {"calls": 0, "ms": 0.0, "bytes": 0})
+        c["calls"] += 1
+        c["ms"] = round(c["ms"] + e["ms"], 3)
+        c["bytes"] += int(e.get("bytes", 0) or 0)
+    cache: dict[str, int] = {}
+    for e in events:
+        if "cache" in e:
+            cache[e["cache"]] = cache.get(e["cache"], 0) + 1
+    return {
+        "page": run["page"],
+        "started": run["started"],
+        "wall_ms": round(((end or time.perf_counter()) - run["t0"]) * 1000, 3),
+        "http_requests": len(http),
+        "http_ms": round(sum(e["ms"] for e in http), 3),
+        "bytes_in": sum(int(e.get("bytes", 0) or 0) for e in http if e["name"].startswith("GET")),
+        "bytes_out": sum(int(e.get("sent", 0) or 0) for e in http),
+        "cache": cache,
+        "calls": calls,
+        "events": events,
+    }
+
+def current_summary() -> dict | None:
+    run = _current.get()
+    return summarize(run) if run is not None else None
+
+def finish_rerun(run: dict | None = None) -> dict | None:
+    """
+    Close this rerun's record, or run (a record start_rerun() returned whose
+    rerun ended early; its wall time then runs to its last event), and
+    append it to IO_LOG_PATH (JSON lines) if set. None if already closed.
+    """
+    current = _current.get()
+    late = run is not None
+    run = current if run is None else run
+    if run is None or run.get("finished"):
+        return None
+    run["finished"] = True
+    if run is current:
+        _current.set(None)
+    summary = summarize(run, run["last"] if late else None)
+    if late:
+        summary["interrupted"] = True
+    log_path = get_secret("IO_LOG_PATH")
+    if log_path:
+        line = json.dumps(summary, ensure_ascii=False) + "\n"
+        with _log_lock:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+    return summary
@@ -0,0 +1,101 @@
+import json
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from lib.write_queue import apply_patches
+
+# One JSON object per line, applied in order on top of the base CSV:
+#   {"op": "patch",  "key": "12", "set": {"status": "Done"}, "ts": ...}
+#   {"op": "insert", "row": {"task_id": "13", ...},          "ts": ...}
+#   {"op": "delete", "key": "12",                            "ts": ...}
+
+def journal_path(path: str) -> str:
+    """data/tasks.csv -> data/tasks.journal.jsonl"""
+    stem = path[:-4] if path.endswith(".csv") else path
+    return f"{stem}.journal.jsonl"
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+def patch_records(patches: dict) -> list[dict]:
+    ts = _now()
+    return [{"op": "patch", "key": str(k), "set": {c: str(v) for c, v in f.items()}, "ts": ts} for k, f in patches.items()]
+
+def insert_records(rows: list[dict]) -> list[dict]:
+    ts = _now()
+    return [{"op": "insert", "row": {c: str(v) for c, v in r.items()}, "ts": ts} for r in rows]
+
+def delete_records(keys) -> list[dict]:
+    ts = _now()
+    return [{"op": "delete", "key": str(k), "ts": ts} for k in keys]
+
+def inserted_keys(text: str, key_col: str) -> list[str]:
+    """Keys of the rows inserted by the journal text (in order, repeats kept)."""
+    keys = []
+    for line in text.splitlines():
+        if '"insert"' in line:
+            r = json.loads(line)
+            if r.get("op") == "insert":
+                keys.append(str(r["row"].get(key_col, "")))
+    return keys
+
+def patches_columns(text: str, cols) -> bool:
+    """True if any patch in the journal text sets one of cols."""
+    cols = set(cols)
+    for line in text.splitlines():
+        if '"patch"' in line:
+            r = json.loads(line)
+            if r.get("op") == "patch" and cols & set(r["set"]):
+                return True
+    return False
+
+def encode(records: list[dict]) -> str:
+    return "".join(json.dumps(r, ensure_ascii=False, sort_keys=True) + "\n" for r in records)
+
+def replay(df: pd.DataFrame, key_col: str, text: str) -> pd.DataFrame:
+    """
+    Fold the journal into df. Consecutive operations on the same key are
+    collapsed first, so the frame is touched once per kind of operation.
+    """
+    if not text.strip():
+        return df
+    patches: dict[str, dict] = {}
+    inserts: dict[str, dict] = {}
+    deletes: set[str] = set()
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        r = json.loads(line)
+        op = r.get("op")
+        if op == "patch":
+            key = str(r["key"])
+            if key in inserts:
+                inserts[key].update(r["set"])
+            else:
+                patches.setdefault(key, {}).update(r["set"])
+        elif op == "insert":
+            row = dict(r["row"])
+            key = str(row.get(key_col, ""))
+            inserts[key] = row   # a base row deleted earlier stays deleted; the insert replaces it
+        elif op == "delete":
+            key = str(r["key"])
+            inserts.pop(key, None)
+            patches.pop(key, None)
+            deletes.add(key)
+
+    df = apply_patches(df, key_col, patches)
+    if deletes and not df.empty:
+        df = df[~df[key_col].astype(str).isin(deletes)].reset_index(drop=True)
+    if inserts:
+        df = pd.concat([df, pd.DataFrame(list(inserts.values()))], ignore_index=True).fillna("")
+    return df
+
+def join_version(base: str, journal: str) -> str:
+    return f"{base}+{journal}"
+
+def split_version(version: str | None) -> tuple[str | None, str | None]:
+    if not version or "+" not in version:
+        return version, None
+    base, journal = version.split("+", 1)
+    return base, journal
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from lib.github_store import StaleWriteError
+
+# --------------------------------------------------
+# THREE-WAY ROW MERGE
+# --------------------------------------------------
+# When a save loses the race (StaleWriteError), write_csv rebases it: the
+# caller's frame is compared with the version it was read at (base), field
+# by field and keyed by the table's primary key, and only what the caller
+# changed is re-applied on top of the latest version (theirs). The save
+# only fails when both sides changed the same field (or one side edited a
+# row the other deleted).
+
+CONFLICT_COLS = ["key", "column", "base", "ours", "theirs"]
+
+class MergeConflict(StaleWriteError):
+    """Both sides changed the same fields; .conflicts lists them (CONFLICT_COLS)."""
+
+    def __init__(self, path: str, conflicts: pd.DataFrame):
+        self.path = path
+        self.conflicts = conflicts
+        first = conflicts.iloc[0]
+        where = f"{first['column']} of row {first['key']}" if first["column"] != "*" else f"row {first['key']}"
+        more = f" and {len(conflicts) - 1} more" if len(conflicts) > 1 else ""
+        super().__init__(
+            f"{path} was changed by someone else in the same place ({where}{more}). "
+            "Reload the page and redo those edits."
+        )
+
+def _indexed(df: pd.DataFrame, key: str, cols: list[str]) -> pd.DataFrame:
+    df = df.reindex(columns=cols, fill_value="").fillna("").astype(str)
+    df.index = pd.Index(df[key].to_numpy(), name=None)
+    if df.index.has_duplicates or (df.index == "").any():
+        raise ValueError(f"{key} is not a unique key")
+    return df
+
+def _row_conflicts(keys, what: tuple[str, str, str]) -> pd.DataFrame:
+    """Whole-row conflicts; what is the (base, ours, theirs) description."""
+    return pd.DataFrame({"key": list(keys), "column": "*", "base": what[0], "ours": what[1], "theirs": what[2]})
+
+def three_way_merge(base: pd.DataFrame, ours: pd.DataFrame, theirs: pd.DataFrame, key: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    ours' changes since base, applied on top of theirs.
+    Returns (merged frame, conflicts); merged keeps theirs' row order with
+    ours' new rows appended. Raises ValueError if key is not a unique key of
+    all three frames (nothing sensible to merge on).
+    """
+    cols = list(dict.fromkeys(list(theirs.columns) + list(ours.columns)))
+    B, O, T = (_indexed(df, key, cols) for df in (base, ours, theirs))
+    conflicts = []
+
+    # fields ours edited
+    common = O.index.intersection(B.index)
+    o_vals, b_vals = O.loc[common, cols].to_numpy(), B.loc[common, cols].to_numpy()
+    edited = o_vals != b_vals
+    rows = edited.any(axis=1)
+    common, edited, o_vals, b_vals = common[rows], edited[rows], o_vals[rows], b_vals[rows]
+
+    gone = ~common.isin(T.index)
+    if gone.any():
+        conflicts.append(_row_conflicts(common[gone], ("", "edited", "deleted")))
+    keep = ~gone
+    common, edited, o_vals, b_vals = common[keep], edited[keep], o_vals[keep], b_vals[keep]
+    if len(common):
+        t_vals = T.loc[common, cols].to_numpy()
+        clash = edited & (t_vals != b_vals) & (t_vals != o_vals)
+        if clash.any():
+            r, c = np.nonzero(clash)
+            conflicts.append(pd.DataFrame({
+                "key": common[r], "column": np.array(cols)[c],
+                "base": b_vals[r, c], "ours": o_vals[r, c], "theirs": t_vals[r, c],
+            }))
+        T.loc[common, cols] = np.where(edited, o_vals, t_vals)
+
+    # rows ours deleted: drop them, unless theirs edited them meanwhile
+    deleted = B.index.difference(O.index).intersection(T.index)
+    if len(deleted):
+        touched = (T.loc[deleted, cols].to_numpy() != B.loc[deleted, cols].to_numpy()).any(axis=1)
+        if touched.any():
+            conflicts.append(_row_conflicts(deleted[touched], ("", "deleted", "edited")))
+        T = T.drop(index=deleted[~touched])
+
+    # rows ours added: append, unless theirs added a different row with the same key
+    added = O.index.difference(B.index)
+    if len(added):
+        both = added[added.isin(T.index)]
+        if len(both):
+            differs = (T.loc[both, cols].to_numpy() != O.loc[both, cols].to_numpy()).any(axis=1)
+            if differs.any():
+                conflicts.append(_row_conflicts(both[differs], ("", "added", "added")))
+        new = O.loc[O.index.isin(added) & ~O.index.isin(T.index), cols]
+        T = pd.concat([T, new])
+
+    found = pd.concat(conflicts, ignore_index=True) if conflicts else pd.DataFrame(columns=CONFLICT_COLS)
+    return T.reset_index(drop=True), found
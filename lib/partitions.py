@@ -0,0 +1,72 @@
+import hashlib
+import json
+import posixpath
+import re
+
+import pandas as pd
+
+# --------------------------------------------------
+# PARTITIONED TABLES
+# --------------------------------------------------
+# A partitioned table keeps its rows in one CSV per value of a routing column
+# instead of one ever-growing file. For tasks that is one shard per event,
+# grouped in a directory per season, plus one shard for General tasks:
+#
+#   data/tasks/manifest.json
+#   data/tasks/general.csv
+#   data/tasks/2025/<event_id>.csv
+#
+# The manifest maps each routing value to its shard ("" is the General
+# shard), so readers never have to list directories. lib.data_store routes
+# reads and writes through it (see data_store.partitioned); this module only
+# knows the layout. tools/partition_tasks.py converts an existing table.
+
+MANIFEST_FORMAT = 1
+GENERAL = "general"
+NO_SEASON = "no-season"
+
+def partition_root(path: str) -> str:
+    """data/tasks.csv -> data/tasks"""
+    return path[:-4] if path.endswith(".csv") else path
+
+def manifest_path(path: str) -> str:
+    return posixpath.join(partition_root(path), "manifest.json")
+
+def _safe(name: str) -> str:
+    name = str(name).strip()
+    if re.fullmatch(r"[A-Za-z0-9_.-]{1,80}", name) and not name.startswith("."):
+        return name
+    return hashlib.sha1(name.encode("utf-8")).hexdigest()
+
+def shard_for(path: str, value: str, season: str = "") -> str:
+    """Repo path of the shard holding the rows whose routing column is value."""
+    root = partition_root(path)
+    if not str(value).strip():
+        return posixpath.join(root, f"{GENERAL}.csv")
+    return posixpath.join(root, _safe(season) if str(season).strip() else NO_SEASON, f"{_safe(value)}.csv")
+
+def new_manifest(by: str) -> dict:
+    return {"format": MANIFEST_FORMAT, "by": by, "shards": {}}
+
+def decode_manifest(text: str) -> dict | None:
+    if not text.strip():
+        return None
+    manifest = json.loads(text)
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise RuntimeError(f"Unsupported partition manifest format {manifest.get('format')!r}.")
+    return manifest
+
+def encode_manifest(manifest: dict) -> str:
+    return json.dumps(manifest, indent=1, sort_keys=True, ensure_ascii=False) + "\n"
+
+def split(df: pd.DataFrame, by: str) -> dict[str, pd.DataFrame]:
+    """{routing value: its rows}, in first-seen order, without the index."""
+    values = df[by].astype(str).str.strip() if by in df.columns else pd.Series("", index=df.index)
+    return {v: part.reset_index(drop=True) for v, part in df.groupby(values.to_numpy(), sort=False)}
+
+def combined_version(manifest_version: str, shards: dict[str, str]) -> str:
+    """One version string for the manifest plus every shard version."""
+    h = hashlib.sha1(manifest_version.encode("utf-8"))
+    for shard in sorted(shards):
+        h.update(f"\n{shard}:{shards[shard]}".encode("utf-8"))
+    return "p" + h.hexdigest()
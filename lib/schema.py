@@ -0,0 +1,163 @@
+import pandas as pd
+
+from lib.typed import DATE_FORMAT, MISSING
+
+# --------------------------------------------------
+# VALUES
+# --------------------------------------------------
+TASK_STATUS = ["Not started", "In progress", "Done", "Blocked"]
+SCOPES = ["General", "Event"]
+EVENT_STATUS = ["Planned", "Open", "Confirmed", "Ongoing", "Completed", "Cancelled"]
+YES_NO = ["Yes", "No"]
+
+# --------------------------------------------------
+# TABLES
+# --------------------------------------------------
+# One entry per CSV: its key column and every column in file order. Column
+# specs are {"kind": ..., plus options}:
+#   id      non-empty, unique text (the key of most tables)
+#   int     whole number (numeric keys, day offsets)
+#   text    anything
+#   date    YYYY-MM-DD; "typed" names the datetime64 column read_typed adds
+#   enum    one of "values" (an empty cell is always allowed)
+# "category": True keeps the column as a pandas categorical in typed frames.
+# Columns missing from a file are added empty on read (see ensure_cols).
+
+SCHEMAS = {
+    "data/events.csv": {
+        "key": "event_id",
+        "columns": {
+            "event_id": {"kind": "id"},
+            "season": {"kind": "int", "category": True},
+            "start_date": {"kind": "date", "typed": "start"},
+            "end_date": {"kind": "date", "typed": "end"},
+            "event_name": {"kind": "text"},
+            "location": {"kind": "text"},
+            "destination_airport": {"kind": "text", "category": True},
+            "arrival_date": {"kind": "date", "typed": "arrival"},
+            "departure_date": {"kind": "date", "typed": "departure"},
+            "requires_availability": {"kind": "enum", "values": YES_NO, "category": True},
+            "arrival_date_td": {"kind": "date"},
+            "arrival_date_ref": {"kind": "date"},
+            "status": {"kind": "enum", "values": EVENT_STATUS, "category": True},
+        },
+    },
+    "data/tasks.csv": {
+        "key": "task_id",
+        "columns": {
+            "task_id": {"kind": "int"},
+            "scope": {"kind": "enum", "values": SCOPES, "category": True},
+            "event_id": {"kind": "text"},
+            "task_name": {"kind": "text"},
+            "due_date": {"kind": "date", "typed": "due"},
+            "owner": {"kind": "text", "category": True},
+            "status": {"kind": "enum", "values": TASK_STATUS, "category": True},
+            "priority": {"kind": "text", "category": True},
+            "category": {"kind": "text", "category": True},
+            "notes": {"kind": "text"},
+        },
+    },
+    "data/task_templates.csv": {
+        "key": "template_id",
+        "columns": {
+            "template_id": {"kind": "int"},
+            "scope": {"kind": "enum", "values": SCOPES},
+            "template_name": {"kind": "text"},
+            "task_name": {"kind": "text"},
+            "due_offset_days": {"kind": "int"},
+            "default_owner": {"kind": "text"},
+            "category": {"kind": "text"},
+            "priority": {"kind": "text"},
+        },
+    },
+    "data/event_files.csv": {
+        "key": "file_id",
+        "columns": {
+            "file_id": {"kind": "id"},
+            "event_id": {"kind": "text"},
+            "category": {"kind": "text"},
+            "title": {"kind": "text"},
+            "url": {"kind": "text"},
+            "version": {"kind": "text"},
+            "uploaded_date": {"kind": "date"},
+            "notes": {"kind": "text"},
+        },
+    },
+    "data/event_reports.csv": {
+        "key": "report_id",
+        "columns": {
+            "report_id": {"kind": "id"},
+            "event_id": {"kind": "text"},
+            "report_type": {"kind": "text"},
+            "title": {"kind": "text"},
+            "url": {"kind": "text"},
+            "report_date": {"kind": "date"},
+            "notes": {"kind": "text"},
+        },
+    },
+}
+
+def _schema(path: str) -> dict:
+    try:
+        return SCHEMAS[path]
+    except KeyError:
+        raise RuntimeError(f"No schema for {path}; add it to lib.schema.SCHEMAS.") from None
+
+def columns(path: str) -> list[str]:
+    return list(_schema(path)["columns"])
+
+def key_column(path: str) -> str:
+    return _schema(path)["key"]
+
+def typed_dates(path: str) -> dict[str, str]:
+    """{raw date column: typed column} for read_typed."""
+    return {c: spec["typed"] for c, spec in SCHEMAS.get(path, {}).get("columns", {}).items() if spec.get("typed")}
+
+def categories(path: str) -> list[str]:
+    return [c for c, spec in SCHEMAS.get(path, {}).get("columns", {}).items() if spec.get("category")]
+
+# --------------------------------------------------
+# VALIDATION
+# --------------------------------------------------
+PROBLEM_COLS = ["row", "column", "value", "problem"]
+
+def validate(path: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Check a raw (all-string) frame against its schema, one vectorized pass per
+    column. Returns one (row, column, value, problem) line per violation.
+    """
+    schema = SCHEMAS.get(path)
+    if schema is None or df.empty:
+        return pd.DataFrame(columns=PROBLEM_COLS)
+
+    found = []
+
+    def report(col: str, mask: pd.Series, problem: str):
+        if mask.any():
+            found.append(pd.DataFrame({
+                "row": df.index[mask], "column": col, "value": df.loc[mask, col].to_numpy(), "problem": problem,
+            }))
+
+    for col, spec in schema["columns"].items():
+        if col not in df.columns:
+            continue
+        s = df[col].astype(str).str.strip()
+        filled = ~s.isin(MISSING)
+        kind = spec["kind"]
+        if kind == "date":
+            bad = filled & pd.to_datetime(s, format=DATE_FORMAT, errors="coerce").isna()
+            report(col, bad, "not a YYYY-MM-DD date")
+        elif kind == "int":
+            report(col, filled & ~s.str.fullmatch(r"-?\d+"), "not a whole number")
+        elif kind == "enum":
+            report(col, filled & ~s.isin(spec["values"]), "not one of " + ", ".join(spec["values"]))
+
+    key = schema["key"]
+    if key in df.columns:
+        k = df[key].astype(str).str.strip()
+        report(key, k == "", "missing key")
+        report(key, (k != "") & k.duplicated(keep=False), "duplicate key")
+
+    if not found:
+        return pd.DataFrame(columns=PROBLEM_COLS)
+    return pd.concat(found, ignore_index=True).sort_values(["row", "column"], kind="stable", ignore_index=True)
@@ -0,0 +1,199 @@
+import bisect
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from lib.task_repo import task_repo
+
+# searchable fields and how much a hit in each counts towards the rank
+FIELD_WEIGHTS = {
+    "task_name": 3.0,
+    "event_name": 2.0,
+    "owner": 2.0,
+    "category": 1.0,
+    "location": 1.0,
+    "notes": 1.0,
+}
+EXACT_BONUS = 1.5   # a whole-token match ranks above a prefix match
+
+_TOKEN = re.compile(r"\w+")
+
+def tokenize(text) -> list[str]:
+    return _TOKEN.findall(str(text).lower())
+
+class TaskSearchIndex:
+    """
+    Inverted index over task text: token -> (doc numbers, weights).
+
+    Queries are multi-term AND; every term also matches as a prefix (found by
+    bisecting the sorted vocabulary). Scores are summed field weights,
+    accumulated in a dense numpy vector, so even broad terms cost one
+    vectorized add per matching token.
+
+    The bulk of the index is built in one vectorized pass. Edits go into a
+    small delta: the old document is tombstoned and the new row gets a fresh
+    doc number, so single-row updates never touch the big posting arrays.
+    """
+
+    def __init__(self, ids: list[str], base: dict, events: dict):
+        self.ids = list(ids)                                  # doc number -> task_id
+        self.doc_no = {t: i for i, t in enumerate(self.ids)}  # task_id -> live doc number
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self.base = base                                      # token -> (docs, weights) arrays
+        self.delta: dict[str, dict[int, float]] = {}          # token -> {doc: weight}
+        self.delta_docs: dict[int, list[str]] = {}            # doc -> its delta tokens
+        self.vocab = sorted(base)
+        self.events = events                                  # event_id -> {"event_name", "location"}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls, tasks: pd.DataFrame, events: pd.DataFrame | None = None) -> "TaskSearchIndex":
+        ev = {}
+        if events is not None and not events.empty:
+            cols = [c for c in ("event_name", "location") if c in events.columns]
+            ev = events.drop_duplicates("event_id").set_index("event_id")[cols].to_dict("index")
+
+        tasks = tasks.reset_index(drop=True)
+        pairs = []
+        for field, w in FIELD_WEIGHTS.items():
+            if field in tasks.columns:
+                col = tasks[field]
+            elif field in ("event_name", "location"):
+                col = tasks["event_id"].map({k: v.get(field, "") for k, v in ev.items()})
+            else:
+                continue
+            toks = col.fillna("").astype(str).str.lower().str.findall(_TOKEN.pattern).explode().dropna()
+            pairs.append(pd.DataFrame({"tok": toks.to_numpy(dtype=object), "doc": toks.index.to_numpy(), "w": w}))
+
+        base = {}
+        if pairs:
+            g = pd.concat(pairs, ignore_index=True).groupby(["tok", "doc"], sort=True)["w"].sum()
+            toks = g.index.get_level_values(0).to_numpy(dtype=object)
+            docs = g.index.get_level_values(1).to_numpy(dtype=np.int64)
+            weights = g.to_numpy(dtype=float)
+            starts = np.flatnonzero(np.r_[True, toks[1:] != toks[:-1]])
+            ends = np.r_[starts[1:], len(toks)]
+            base = {toks[a]: (docs[a:b], weights[a:b]) for a, b in zip(starts, ends)}
+        return cls(tasks["task_id"].astype(str).tolist(), base, ev)
+
+    def _weights(self, row: dict) -> dict[str, float]:
+        row = dict(row)
+        for c, v in self.events.get(str(row.get("event_id", "")), {}).items():
+            if not row.get(c):
+                row[c] = v
+        weights: dict[str, float] = {}
+        for field, w in FIELD_WEIGHTS.items():
+            for tok in tokenize(row.get(field, "")):
+                weights[tok] = weights.get(tok, 0.0) + w
+        return weights
+
+    def _drop(self, task_id: str):
+        doc = self.doc_no.pop(task_id, None)
+        if doc is None:
+            return
+        if doc < len(self.alive):
+            self.alive[doc] = False
+        for tok in self.delta_docs.pop(doc, []):
+            self.delta[tok].pop(doc, None)
+
+    def upsert(self, row: dict):
+        task_id = str(row["task_id"])
+        with self._lock:
+            self._drop(task_id)
+            doc = len(self.ids)
+            self.ids.append(task_id)
+            self.doc_no[task_id] = doc
+            weights = self._weights(row)
+            for tok, w in weights.items():
+                if tok not in self.delta:
+                    self.delta[tok] = {}
+                    if tok not in self.base:
+                        bisect.insort(self.vocab, tok)
+                self.delta[tok][doc] = w
+            self.delta_docs[doc] = list(weights)
+
+    def remove(self, task_id):
+        with self._lock:
+            self._drop(str(task_id))
+
+    def _term_scores(self, term: str, n: int) -> np.ndarray:
+        scores = np.zeros(n)
+        i = bisect.bisect_left(self.vocab, term)
+        while i < len(self.vocab) and self.vocab[i].startswith(term):
+            tok = self.vocab[i]
+            boost = EXACT_BONUS if tok == term else 1.0
+            hit = self.base.get(tok)
+            if hit is not None:
+                scores[hit[0]] += hit[1] * boost
+            for doc, w in self.delta.get(tok, {}).items():
+                scores[doc] += w * boost
+            i += 1
+        return scores
+
+    def search(self, q: str) -> list[str] | None:
+        """
+        Ranked task_ids matching every term of q (as a prefix).
+        None if q has no terms, i.e. "no search filter".
+        """
+        terms = sorted(set(tokenize(q)), key=len, reverse=True)  # longest = most selective first
+        if not terms:
+            return None
+        with self._lock:
+            n = len(self.ids)
+            mask = np.zeros(n, dtype=bool)
+            mask[: len(self.alive)] = self.alive
+            mask[len(self.alive):] = True
+            total = np.zeros(n)
+            for term in terms:
+                scores = self._term_scores(term, n)
+                mask &= scores > 0
+                if not mask.any():
+                    return []
+                total += scores
+            hits = np.flatnonzero(mask)
+            order = hits[np.argsort(-total[hits], kind="stable")]
+            return [self.ids[d] for d in order]
+
+# --------------------------------------------------
+# SHARED INDEX
+# --------------------------------------------------
+# One index per process, keyed by the (tasks, events) versions it was built
+# from. Edits made through task_repo are applied to it in place and move it to
+# the new tasks version, so the next rerun reuses it instead of rebuilding;
+# a write that also carried other writers' changes drops it instead.
+
+_shared = {"key": None, "index": None}
+_shared_lock = threading.Lock()
+
+def task_search_index(tasks: pd.DataFrame, events: pd.DataFrame, tasks_sha: str | None = None) -> TaskSearchIndex:
+    """
+    Shared index for these frames. Pass tasks_sha when tasks was merged with
+    events (pd.merge drops df.attrs when the two sides disagree).
+    """
+    key = (tasks_sha or tasks.attrs.get("sha"), events.attrs.get("sha"))
+    with _shared_lock:
+        if _shared["index"] is not None and _shared["key"] == key and all(key):
+            return _shared["index"]
+    index = TaskSearchIndex.build(tasks, events)
+    with _shared_lock:
+        _shared["key"], _shared["index"] = key, index
+    return index
+
+def _on_tasks_changed(old_sha: str, new_sha: str, upserts: dict, deletes: list):
+    with _shared_lock:
+        index, key = _shared["index"], _shared["key"]
+        if index is None or key is None:
+            return
+        if old_sha is None or key[0] != old_sha:
+            # new_sha is not just our edit on top of the indexed version: rebuild next run
+            _shared["key"] = None
+            return
+        for row in upserts.values():
+            index.upsert(row)
+        for task_id in deletes:
+            index.remove(task_id)
+        _shared["key"] = (new_sha, key[1])
+
+task_repo.subscribe(_on_tasks_changed)
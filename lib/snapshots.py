@@ -0,0 +1,78 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from lib.backends import ROOT, table_name
+from lib.config import get_flag, get_secret
+from lib.schema import PROBLEM_COLS
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:   # pyarrow ships with streamlit; without it snapshots are simply off
+    pa = feather = None
+
+# --------------------------------------------------
+# COLUMNAR SNAPSHOTS
+# --------------------------------------------------
+# A typed frame (read_typed) is saved as an uncompressed Feather file named
+# after the table version it was built from, and memory-mapped back on the
+# next load of that version, so a fresh process skips CSV parsing and date
+# conversion. A new version simply misses and writes a new snapshot; older
+# snapshots of the same table are removed at that point. Files are also keyed
+# by the backend they came from (Backend.source): SQLite versions are plain
+# counters, so the same version string means nothing across databases.
+# SNAPSHOTS=0 turns this off; SNAPSHOT_DIR moves the files (default .cache/snapshots).
+
+SNAPSHOT_FORMAT = 2   # bump when the typed frame layout changes
+
+def snapshots_enabled() -> bool:
+    return feather is not None and get_flag("SNAPSHOTS", True)
+
+def snapshot_dir() -> str:
+    return get_secret("SNAPSHOT_DIR") or os.path.join(ROOT, ".cache", "snapshots")
+
+def _prefix(source: str, path: str, columns: list[str]) -> str:
+    spec = json.dumps([SNAPSHOT_FORMAT, source, path, list(columns)]).encode("utf-8")
+    return f"{table_name(path)}-{hashlib.sha1(spec).hexdigest()[:12]}"
+
+def _file(source: str, path: str, version: str, columns: list[str]) -> str:
+    digest = hashlib.sha1(version.encode("utf-8")).hexdigest()
+    return os.path.join(snapshot_dir(), f"{_prefix(source, path, columns)}-{digest}.feather")
+
+def load_snapshot(source: str, path: str, version: str, columns: list[str]):
+    """(typed frame, validation problems) saved for this version of path in source, or None."""
+    if not version or not snapshots_enabled():
+        return None
+    try:
+        table = feather.read_table(_file(source, path, version, columns), memory_map=True)
+    except (FileNotFoundError, pa.ArrowInvalid, OSError):
+        return None
+    meta = table.schema.metadata or {}
+    problems = pd.DataFrame(json.loads(meta.get(b"problems", b"[]")), columns=PROBLEM_COLS)
+    return table.to_pandas(), problems
+
+def save_snapshot(source: str, path: str, version: str, columns: list[str], df: pd.DataFrame,
+                  problems: pd.DataFrame):
+    if not version or not snapshots_enabled():
+        return
+    target = _file(source, path, version, columns)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        meta = dict(table.schema.metadata or {})
+        meta[b"problems"] = problems.to_json(orient="values").encode("utf-8")
+        table = table.replace_schema_metadata(meta)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        os.close(fd)
+        feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, target)
+        for old in glob.glob(os.path.join(os.path.dirname(target), _prefix(source, path, columns) + "-*.feather")):
+            if old != target:
+                os.remove(old)
+    except (OSError, pa.ArrowException):
+        pass   # a snapshot is only an optimisation
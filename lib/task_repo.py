@@ -0,0 +1,233 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from lib.data_store import (
+    journal_append, journal_base_keys, journal_enabled, patch_rows, read_csv, write_behind_enabled, write_csv,
+)
+from lib.github_store import StaleWriteError
+from lib.ids import note_version, reserve_ids, resolve_collisions
+from lib.journal import delete_records, insert_records, inserted_keys, patch_records, split_version
+from lib.schema import columns, key_column
+
+TASKS_PATH = "data/tasks.csv"
+TASK_COLS = columns(TASKS_PATH)
+
+def _match_key(df: pd.DataFrame, cols: list[str]) -> pd.Series:
+    parts = [df[c].astype(str).str.strip().str.lower() if c in df.columns else pd.Series("", index=df.index) for c in cols]
+    key = parts[0]
+    for p in parts[1:]:
+        key = key + "\x1f" + p
+    return key
+
+def existing_rows(new: pd.DataFrame, df: pd.DataFrame, cols: list[str]) -> pd.Series:
+    """Mask of the rows of new matching a row of df, or an earlier row of new, on cols."""
+    keys = _match_key(new, cols)
+    return keys.isin(set(_match_key(df, cols))) | keys.duplicated()
+
+class TaskRepo:
+    """
+    Row-level operations on the tasks table.
+
+    Every operation reads the latest version once, locates rows through an
+    id -> position index (built once per version), and makes at most ONE
+    write for the whole batch. Operations that would not change anything
+    return 0 and do not write, so a no-op save never produces a commit.
+
+    With the change journal on (lib.data_store.journal_enabled) the write is
+    an append of just the changed rows instead of a rewrite of the CSV.
+
+    Subscribers (see subscribe) are told about every successful change, so
+    derived structures such as the search index can update in place.
+    """
+
+    def __init__(self, path: str = TASKS_PATH, key: str = key_column(TASKS_PATH), columns: list[str] = TASK_COLS):
+        self.path = path
+        self.key = key
+        self.columns = columns
+        self._index = ("", 0, pd.Index([]), np.array([], dtype=int))
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def subscribe(self, fn):
+        """
+        fn(old_sha, new_sha, upserts: {task_id: row dict}, deletes: [task_id]).
+        old_sha is None when new_sha also holds changes from other writers.
+        """
+        self._listeners.append(fn)
+
+    def _notify(self, old_sha, new_sha, upserts: dict, deletes: list):
+        for fn in self._listeners:
+            fn(old_sha, new_sha, upserts, deletes)
+
+    def _save(self, df: pd.DataFrame, message: str, sha: str | None) -> tuple[str, str | None]:
+        """
+        write_csv of df read at sha. Returns (new version, parent): parent is
+        sha when the save went straight on top of it, None when it was merged
+        onto someone else's save.
+        """
+        try:
+            return write_csv(self.path, df, message, sha=sha, rebase=False), sha
+        except StaleWriteError:
+            return write_csv(self.path, df, message, sha=sha), None
+
+    def _append(self, records: list[dict], message: str, sha: str | None, rekey=None) -> tuple[str, str | None]:
+        """journal_append onto sha; (new version, parent) as for _save."""
+        try:
+            new_sha = journal_append(self.path, records, message, sha, rekey=rekey, rebase=False)
+        except StaleWriteError:
+            return journal_append(self.path, records, message, sha, rekey=rekey), None
+        # a compaction on the way folds in whatever was appended after us
+        return new_sha, sha if split_version(new_sha)[0] == split_version(sha)[0] else None
+
+    def load(self) -> pd.DataFrame:
+        return read_csv(self.path, self.columns)
+
+    def _positions(self, df: pd.DataFrame, ids) -> list[int]:
+        """Row position of each id in df (first occurrence), -1 if absent."""
+        sha = df.attrs.get("sha", "")
+        with self._lock:
+            version, n_rows, index, positions = self._index
+            # pending write-behind patches never touch the key column, so the version is enough
+            if not sha or version != sha or n_rows != len(df):
+                keys = df[self.key].astype(str)
+                first = ~keys.duplicated()
+                index = pd.Index(keys[first])
+                positions = np.flatnonzero(first.to_numpy())
+                self._index = (sha, len(df), index, positions)
+        found = index.get_indexer([str(i) for i in ids])
+        return [int(positions[i]) if i >= 0 else -1 for i in found]
+
+    def patch(self, task_id, fields: dict, message: str | None = None) -> int:
+        return self.patch_many({task_id: fields}, message or f"Update task {task_id}")
+
+    def patch_many(self, patches: dict, message: str | None = None) -> int:
+        """
+        Apply {task_id: {col: value}}. Only fields whose value actually differs
+        are written. Returns the number of rows changed (0 = no-op, no write).
+        """
+        df = self.load()
+        changed = {}
+        for (task_id, fields), p in zip(patches.items(), self._positions(df, patches)):
+            if p < 0:
+                continue
+            diff = {
+                c: str(v) for c, v in fields.items()
+                if c not in df.columns or df.iat[p, df.columns.get_loc(c)] != str(v)
+            }
+            if diff:
+                changed[str(task_id)] = (p, diff)
+        if not changed:
+            return 0
+
+        message = message or f"Update {len(changed)} tasks"
+        old_sha = df.attrs.get("sha")
+        diffs = {k: diff for k, (_, diff) in changed.items()}
+        upserts = {k: df.iloc[p].to_dict() | diff for k, (p, diff) in changed.items()}
+        if write_behind_enabled():
+            patch_rows(self.path, self.key, diffs, message)
+            new_sha, parent = old_sha, old_sha
+        elif journal_enabled(self.path):
+            new_sha, parent = self._append(patch_records(diffs), message, old_sha)
+        else:
+            for p, diff in changed.values():
+                for c, v in diff.items():
+                    if c not in df.columns:
+                        df[c] = ""
+                    df.iat[p, df.columns.get_loc(c)] = v
+            new_sha, parent = self._save(df, message, old_sha)
+        self._notify(parent, new_sha, upserts, [])
+        return len(changed)
+
+    def insert_many(self, rows: list[dict], message: str | None = None) -> list[str]:
+        """
+        Append rows in one write. Rows without a task_id get the next free ids.
+        Returns the ids of the inserted rows.
+        """
+        if not rows:
+            return []
+        return self.insert_frame(pd.DataFrame(rows), message)
+
+    def insert_frame(self, rows: pd.DataFrame, message: str | None = None,
+                     skip_existing: list[str] | None = None, retries: int = 3) -> list[str]:
+        """
+        insert_many for a whole frame, without per-row Python work.
+        skip_existing names the columns that identify a task (e.g. event_id +
+        task_name, compared trimmed and case-insensitively); rows matching a task
+        already in the table, or an earlier row of the frame, are left out.
+        Missing ids are reserved from lib.ids; if another writer used the same
+        ids meanwhile, only the clashing rows are renumbered at write time.
+        """
+        if rows.empty:
+            return []
+        df = self.load()
+        out = rows.fillna("").astype(str)
+        out = out.reindex(columns=list(dict.fromkeys(self.columns + list(out.columns))), fill_value="")
+        if skip_existing:
+            out = out[~existing_rows(out, df, skip_existing)]
+        if out.empty:
+            return []
+        out = out.reset_index(drop=True)
+        missing = (out[self.key] == "").to_numpy()
+        out.loc[missing, self.key] = reserve_ids(self.path, df, int(missing.sum()), self.key)
+
+        def rekey(text: str) -> list[dict]:
+            # ids appended to the journal since we read, or folded into the base by a compaction
+            nonlocal out
+            taken = inserted_keys(text, self.key) + journal_base_keys(self.path, sha)
+            out = resolve_collisions(self.path, out, taken, self.key)
+            return insert_records(out.to_dict("records"))
+
+        for attempt in range(retries):
+            sha = df.attrs.get("sha")
+            if attempt:
+                # the table moved on: drop what now exists, renumber what clashes
+                if skip_existing:
+                    out = out[~existing_rows(out, df, skip_existing)].reset_index(drop=True)
+                    if out.empty:
+                        return []
+                out = resolve_collisions(self.path, out, df[self.key].astype(str), self.key)
+            n = len(out)
+            message = message or (f"Add task {out[self.key].iat[0]}" if n == 1 else f"Add {n} tasks")
+            if journal_enabled(self.path):
+                new_sha, parent = self._append([], message, sha, rekey=rekey)
+                # compacted on the way: the new base may hold ids rekey never saw
+                scanned = split_version(new_sha)[0] == split_version(sha)[0]
+                break
+            try:
+                # no merge: a save is either exactly df + out (ids checked against df) or retried here
+                new_sha = write_csv(self.path, pd.concat([df, out], ignore_index=True).fillna(""), message,
+                                    sha=sha, rebase=False)
+                parent, scanned = sha, True
+                break
+            except StaleWriteError:
+                if attempt == retries - 1:
+                    raise
+                df = self.load()
+        if scanned:
+            # every id in new_sha is now below the mark (df was observed, rekey/retries raised it)
+            note_version(self.path, new_sha)
+
+        new_ids = out[self.key].tolist()
+        self._notify(parent, new_sha, dict(zip(new_ids, out.to_dict("records"))), [])
+        return new_ids
+
+    def delete_many(self, ids, message: str | None = None) -> int:
+        """Remove rows by id in one write. Returns how many rows were removed."""
+        df = self.load()
+        sha = df.attrs.get("sha")
+        keep = ~df[self.key].astype(str).isin({str(i) for i in ids})
+        removed = int((~keep).sum())
+        if not removed:
+            return 0
+        deleted = df.loc[~keep, self.key].astype(str).tolist()
+        message = message or f"Delete {removed} tasks"
+        if journal_enabled(self.path):
+            new_sha, parent = self._append(delete_records(dict.fromkeys(deleted)), message, sha)
+        else:
+            new_sha, parent = self._save(df[keep].reset_index(drop=True), message, sha)
+        self._notify(parent, new_sha, {}, deleted)
+        return removed
+
+task_repo = TaskRepo()
@@ -0,0 +1,60 @@
+import math
+
+import pandas as pd
+
+# label -> sort columns; open tasks always come before done ones
+SORT_KEYS = {
+    "Relevance": ["rank", "due", "task_name"],   # search rank; same as Due date without a query
+    "Due date": ["due", "task_name"],
+    "Task name": ["task_name", "due"],
+    "Owner": ["owner", "due", "task_name"],
+    "Event": ["event_name", "due", "task_name"],
+}
+
+def filter_tasks(tasks: pd.DataFrame, q: str = "", scope: str = "All", status: str = "All",
+                 index=None) -> pd.DataFrame:
+    """
+    With a lib.search.TaskSearchIndex, q is matched through the index (prefix,
+    all terms, more fields) and a "rank" column is added; without one it falls
+    back to substring scans of task_name / event_name / owner.
+    """
+    view = tasks
+    if scope != "All":
+        view = view[view["scope"] == scope]
+    if status != "All":
+        view = view[view["status"] == status]
+    ranked = index.search(q) if index is not None else None
+    if ranked is not None:
+        rank = pd.Series(range(len(ranked)), index=pd.Index(ranked, dtype=object), dtype=float)
+        rank = rank.groupby(level=0).min()   # duplicate task_ids keep their best rank
+        view = view.assign(rank=view["task_id"].astype(str).map(rank))
+        view = view[view["rank"].notna()]
+    elif index is None and q.strip():
+        qq = q.lower()
+        view = view[
+            view["task_name"].str.lower().str.contains(qq, na=False, regex=False) |
+            view["event_name"].str.lower().str.contains(qq, na=False, regex=False) |
+            view["owner"].str.lower().str.contains(qq, na=False, regex=False)
+        ]
+    return view
+
+def sort_tasks(view: pd.DataFrame, sort_by: str = "Due date") -> pd.DataFrame:
+    """Sort the whole filtered set (before any paging), done tasks last."""
+    view = view.assign(is_done=view["status"] == "Done")
+    if sort_by == "Relevance" and "rank" not in view.columns:
+        sort_by = "Due date"
+    return view.sort_values(["is_done"] + SORT_KEYS[sort_by], kind="stable")
+
+def n_pages(n_rows: int, page_size: int) -> int:
+    """Pages needed for n_rows (at least one, so an empty list still has page 1)."""
+    return max(1, math.ceil(n_rows / page_size))
+
+def page_slice(view: pd.DataFrame, page: int, page_size: int) -> tuple[pd.DataFrame, int, int]:
+    """
+    Rows for 1-based page, clamped to the valid range.
+    Returns (rows, page, n_pages).
+    """
+    pages = n_pages(len(view), page_size)
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    return view.iloc[start:start + page_size], page, pages
@@ -0,0 +1,85 @@
+from datetime import date
+
+import pandas as pd
+
+from lib.data_store import read_csv
+from lib.task_repo import existing_rows, task_repo
+from lib.typed import DATE_FORMAT
+
+TEMPLATES_PATH = "data/task_templates.csv"
+EVENTS_PATH = "data/events.csv"
+
+# a task generated from a template is "the same task" as an existing one when
+# these match (trimmed, case-insensitive); re-applying a template skips it
+TASK_IDENTITY = ["scope", "event_id", "task_name"]
+
+# --------------------------------------------------
+# EXPANSION
+# --------------------------------------------------
+# Templates are turned into task rows with whole-column operations: an Event
+# template is cross-joined with the chosen events and each due date is the
+# event start plus the row's offset, so a season of events costs one merge
+# rather than a Python loop per (event, template row).
+
+def template_rows(tpl: pd.DataFrame, name: str, scope: str) -> pd.DataFrame:
+    s = tpl["scope"].astype(str).str.strip()
+    s = s.where(s != "", "Event")   # rows without a scope are Event rows
+    return tpl[(s.str.lower() == scope.lower()) & (tpl["template_name"] == name)]
+
+def _offsets(rows: pd.DataFrame) -> pd.Series:
+    return pd.to_timedelta(pd.to_numeric(rows["due_offset_days"], errors="coerce").fillna(0), unit="D")
+
+def _tasks(rows: pd.DataFrame, scope: str, event_id, due: pd.Series, name: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        "scope": scope,
+        "event_id": event_id,
+        "task_name": rows["task_name"].to_numpy(),
+        "due_date": due.dt.strftime(DATE_FORMAT).fillna("").to_numpy(),
+        "owner": rows["default_owner"].to_numpy(),
+        "status": "Not started",
+        "priority": rows["priority"].to_numpy(),
+        "category": rows["category"].to_numpy(),
+        "notes": f"From template: {name}",
+    })
+
+def expand_general_template(tpl: pd.DataFrame, name: str, today: date) -> pd.DataFrame:
+    """General template -> task rows due today + offset."""
+    rows = template_rows(tpl, name, "General").reset_index(drop=True)
+    return _tasks(rows, "General", "", pd.Timestamp(today) + _offsets(rows), name)
+
+def expand_event_template(tpl: pd.DataFrame, name: str, events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Event template x events -> task rows due at each event's start_date +
+    offset (empty when the event has no valid start date).
+    """
+    rows = template_rows(tpl, name, "Event").drop(columns=["event_id", "start_date"], errors="ignore")
+    if rows.empty or events.empty:
+        return _tasks(rows.iloc[:0], "Event", "", pd.Series([], dtype="datetime64[ns]"), name)
+    pairs = events[["event_id", "start_date"]].merge(rows, how="cross")
+    start = pd.to_datetime(pairs["start_date"], format=DATE_FORMAT, errors="coerce")
+    return _tasks(pairs, "Event", pairs["event_id"].to_numpy(), start + _offsets(pairs), name)
+
+def skipped_rows(new: pd.DataFrame, tasks: pd.DataFrame) -> pd.Series:
+    """
+    Mask of the rows of new that applying would skip: they match a task in
+    tasks or an earlier row of new (see TASK_IDENTITY).
+    """
+    return existing_rows(new, tasks, TASK_IDENTITY)
+
+# --------------------------------------------------
+# APPLY
+# --------------------------------------------------
+def apply_event_template(name: str, event_ids: list[str], message: str | None = None) -> tuple[list[str], int]:
+    """
+    Create the tasks of Event template name for every event in event_ids, in
+    one write. Tasks the event already has (same task_name) are skipped, so
+    applying a template twice is harmless. Returns (new task ids, skipped).
+    """
+    events = read_csv(EVENTS_PATH)
+    events = events[events["event_id"].isin([str(e) for e in event_ids])]
+    new = expand_event_template(read_csv(TEMPLATES_PATH), name, events)
+    if new.empty:
+        return [], 0
+    message = message or f"Apply Event template {name} to {events['event_id'].nunique()} event(s)"
+    ids = task_repo.insert_frame(new, message, skip_existing=TASK_IDENTITY)
+    return ids, len(new) - len(ids)
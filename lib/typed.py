@@ -0,0 +1,36 @@
+import pandas as pd
+
+DATE_FORMAT = "%Y-%m-%d"
+
+# placeholders that mean "no date yet" rather than "bad date"
+MISSING = ["", "NaT", "nan", "NaN", "None"]
+
+def parse_dates(df: pd.DataFrame, cols: dict, fmt: str = DATE_FORMAT) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Add datetime64 columns for cols ({raw: typed}) in one vectorized pass each.
+    Unparsable values become NaT and are reported as
+    (row, column, value) in the returned errors frame.
+    """
+    errors = []
+    for raw, typed in cols.items():
+        if raw not in df.columns:
+            df[typed] = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+            continue
+        s = df[raw].astype(str).str.strip()
+        parsed = pd.to_datetime(s, format=fmt, errors="coerce")
+        bad = parsed.isna() & ~s.isin(MISSING)
+        if bad.any():
+            errors.append(pd.DataFrame({"row": df.index[bad], "column": raw, "value": s[bad].values}))
+        df[typed] = parsed
+    if errors:
+        report = pd.concat(errors, ignore_index=True)
+    else:
+        report = pd.DataFrame(columns=["row", "column", "value"])
+    return df, report
+
+def to_categories(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
+    """Store the given text columns as categoricals (one code per row)."""
+    for c in cols:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    return df
@@ -0,0 +1,119 @@
+import json
+import os
+
+import pandas as pd
+import streamlit as st
+
+from lib import instrument
+from lib.backends import get_backend
+from lib.data_store import flush_writes, last_write_error, pending_writes
+from lib.github_store import StaleWriteError, cache_stats, rate_limit_stats
+
+def show_write_error(e: StaleWriteError):
+    """
+    Explain a save that was refused because the file changed since it was
+    read; for a MergeConflict also list the fields both sides changed.
+    """
+    st.error(str(e))
+    conflicts = getattr(e, "conflicts", None)
+    if conflicts is not None and not conflicts.empty:
+        st.dataframe(conflicts, use_container_width=True, hide_index=True)
+
+def pending_writes_sidebar():
+    """Sidebar notice for edits the write-behind queue has not committed yet."""
+    pending = pending_writes()
+    err = last_write_error()
+    if not pending and not err:
+        return
+    with st.sidebar:
+        if pending:
+            total = sum(pending.values())
+            files = ", ".join(p.split("/")[-1] for p in pending)
+            st.caption(f"⏳ {total} unsaved change(s) in {files}")
+            if st.button("💾 Save now", key="flush_pending_writes"):
+                try:
+                    flush_writes()
+                except RuntimeError as e:
+                    st.error(str(e))
+                else:
+                    st.rerun()
+        if err:
+            st.warning(f"Last save failed: {err}")
+
+# --------------------------------------------------
+# I/O DEBUG PANEL (IO_DEBUG=1, see lib.instrument)
+# --------------------------------------------------
+IO_HISTORY = 50   # reruns kept per session for the JSON lines download
+
+def _keep(summary: dict):
+    history = st.session_state.setdefault("io_history", [])
+    history.append(summary)
+    del history[:-IO_HISTORY]
+
+def io_debug_start(page_file: str):
+    """Call at the top of a page with __file__."""
+    # a rerun that ended in st.rerun() (e.g. after a save) never reached io_debug_sidebar
+    left = st.session_state.pop("io_run", None)
+    if left is not None:
+        summary = instrument.finish_rerun(left)
+        if summary is not None:
+            _keep(summary)
+            st.session_state["io_interrupted"] = summary
+    st.session_state["io_run"] = instrument.start_rerun(os.path.basename(page_file))
+
+def _show_github_totals():
+    """Process-wide GitHub counters: read cache and API quota since the app started."""
+    cache, quota = cache_stats(), rate_limit_stats()
+    st.markdown("**GitHub (this process)**")
+    st.caption(
+        f"read cache: {cache['hits']} hit(s), {cache['revalidated']} revalidated, {cache['misses']} miss(es), "
+        f"{cache['evictions']} eviction(s) · {cache['entries']} file(s), {cache['bytes'] / 1024:.1f} KB"
+    )
+    if quota["limit"]:
+        st.caption(
+            f"quota: {quota['remaining']}/{quota['limit']} left ({quota['headroom_pct']}%), "
+            f"resets in {quota['reset_in']} s"
+        )
+    st.caption(
+        f"{quota['requests']} request(s) · throttled {quota['throttled_calls']} call(s) "
+        f"({quota['throttled_seconds']:.1f} s) · {quota['rate_limit_retries']} rate-limit retry(ies)"
+    )
+
+def _show_summary(summary: dict):
+    st.caption(
+        f"{summary['wall_ms']:.0f} ms · {summary['http_requests']} GitHub request(s) "
+        f"({summary['http_ms']:.0f} ms, {summary['bytes_in'] / 1024:.1f} KB in, "
+        f"{summary['bytes_out'] / 1024:.1f} KB out)"
+    )
+    if summary["cache"]:
+        st.caption("cache: " + ", ".join(f"{k} {v}" for k, v in sorted(summary["cache"].items())))
+    if summary["calls"]:
+        calls = pd.DataFrame.from_dict(summary["calls"], orient="index").sort_values("ms", ascending=False)
+        st.dataframe(calls, use_container_width=True)
+    if summary["events"]:
+        st.dataframe(pd.DataFrame(summary["events"]), use_container_width=True, hide_index=True)
+
+def io_debug_sidebar():
+    """Call at the end of a page: shows what this rerun (and one cut short before it) read and wrote."""
+    st.session_state.pop("io_run", None)
+    summary = instrument.finish_rerun()
+    if summary is None:
+        return
+    _keep(summary)
+    history = st.session_state["io_history"]
+    interrupted = st.session_state.pop("io_interrupted", None)
+
+    with st.sidebar.expander("🔍 I/O this rerun"):
+        _show_summary(summary)
+        if interrupted is not None:
+            st.markdown(f"**Previous rerun** (ended by st.rerun, {interrupted['page']})")
+            _show_summary(interrupted)
+        if get_backend().name == "github":
+            _show_github_totals()
+        st.download_button(
+            f"Download last {len(history)} rerun(s) (JSON lines)",
+            "".join(json.dumps(s, ensure_ascii=False) + "\n" for s in history),
+            file_name="io-reruns.jsonl",
+            mime="application/jsonl",
+            key="io_debug_download",
+        )
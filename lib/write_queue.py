@@ -0,0 +1,163 @@
+import atexit
+import threading
+import time
+
+import pandas as pd
+
+def apply_patches(df: pd.DataFrame, key_col: str, patches: dict) -> pd.DataFrame:
+    """
+    Apply {key: {col: value}} to the rows of df whose key_col matches.
+    Keys that are not in df are ignored (the row was deleted meanwhile).
+    """
+    if not patches or df.empty:
+        return df
+    for col in {c for fields in patches.values() for c in fields}:
+        if col not in df.columns:
+            df[col] = ""
+    keys = df[key_col].astype(str)
+    idx = pd.Index(keys)
+    if not idx.is_unique:
+        for key, fields in patches.items():
+            mask = keys == str(key)
+            for col, v in fields.items():
+                df.loc[mask, col] = v
+        return df
+    pos = idx.get_indexer([str(k) for k in patches])
+    for p, fields in zip(pos, patches.values()):
+        if p < 0:
+            continue
+        for col, v in fields.items():
+            df.iat[p, df.columns.get_loc(col)] = v
+    return df
+
+class WriteBehindQueue:
+    """
+    Collects row patches per file and commits them in batches.
+
+    A background thread waits until no new patch has arrived for `debounce`
+    seconds, then hands each file's pending patches to commit() as one batch,
+    i.e. one commit. Patches stay pending (and keep being retried) until a
+    write succeeds, and are flushed at interpreter exit.
+
+    commit(path, key_col, patches, message) and store(path, df, message, version)
+    are supplied by lib.data_store, so queued writes take the same route
+    (plain CSV or change journal) as direct ones.
+    """
+
+    def __init__(self, commit, store, debounce: float = 3.0):
+        self.commit = commit
+        self.store = store
+        self.debounce = debounce
+        self._pending: dict[str, dict] = {}     # path -> {"key_col", "patches", "messages"}
+        self._last_enqueue = 0.0
+        self._cond = threading.Condition()
+        self._path_locks: dict[str, threading.Lock] = {}
+        self.last_error: str = ""
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _lock_for(self, path: str) -> threading.Lock:
+        with self._cond:
+            return self._path_locks.setdefault(path, threading.Lock())
+
+    def enqueue(self, path: str, key_col: str, patches: dict, message: str):
+        with self._cond:
+            entry = self._pending.setdefault(path, {"key_col": key_col, "patches": {}, "messages": []})
+            for key, fields in patches.items():
+                entry["patches"].setdefault(str(key), {}).update(fields)
+            entry["messages"].append(message)
+            self._last_enqueue = time.monotonic()
+            self._cond.notify_all()
+
+    def pending(self) -> dict[str, int]:
+        """{path: number of rows with unsaved changes}"""
+        with self._cond:
+            return {p: len(e["patches"]) for p, e in self._pending.items() if e["patches"]}
+
+    def overlay(self, path: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Show pending patches in a freshly read frame, so the UI reflects them immediately."""
+        with self._cond:
+            entry = self._pending.get(path)
+            if not entry or not entry["patches"]:
+                return df
+            key_col = entry["key_col"]
+            patches = {k: dict(v) for k, v in entry["patches"].items()}
+        return apply_patches(df, key_col, patches)
+
+    def _take(self, path: str):
+        with self._cond:
+            entry = self._pending.get(path)
+            if not entry or not entry["patches"]:
+                return None
+            return entry["key_col"], {k: dict(v) for k, v in entry["patches"].items()}, list(entry["messages"])
+
+    def _done(self, path: str, patches: dict, n_messages: int):
+        # drop what was written, but keep anything re-patched while the write was in flight
+        with self._cond:
+            entry = self._pending.get(path)
+            if not entry:
+                return
+            for key, fields in patches.items():
+                live = entry["patches"].get(key)
+                if live is None:
+                    continue
+                for col, v in fields.items():
+                    if live.get(col) == v:
+                        live.pop(col)
+                if not live:
+                    entry["patches"].pop(key)
+            del entry["messages"][:n_messages]
+            if not entry["patches"]:
+                self._pending.pop(path, None)
+
+    def flush_path(self, path: str):
+        with self._lock_for(path):
+            taken = self._take(path)
+            if taken is None:
+                return
+            key_col, patches, messages = taken
+            message = messages[0] if len(messages) == 1 else f"Batch update {len(patches)} rows ({len(messages)} edits)"
+            self.commit(path, key_col, patches, message)
+            self._done(path, patches, len(messages))
+
+    def write_through(self, path: str, df: pd.DataFrame, message: str, version: str | None, store=None) -> str:
+        """
+        A whole-file write that also carries (and clears) the pending patches
+        for path; store overrides the queue's store function for this write.
+        """
+        with self._lock_for(path):
+            taken = self._take(path)
+            if taken is not None:
+                key_col, patches, messages = taken
+                df = apply_patches(df, key_col, patches)
+            new_version = (store or self.store)(path, df, message, version)
+            if taken is not None:
+                self._done(path, patches, len(messages))
+            return new_version
+
+    def flush(self):
+        errors = []
+        for path in list(self.pending()):
+            try:
+                self.flush_path(path)
+            except Exception as e:
+                errors.append(f"{path}: {e}")
+        self.last_error = "; ".join(errors)
+        if errors:
+            raise RuntimeError("Some pending changes could not be saved: " + self.last_error)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self.pending():
+                    self._cond.wait()
+                wait = self._last_enqueue + self.debounce - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            try:
+                self.flush()
+            except Exception:
+                # keep the patches; back off before the next attempt
+                time.sleep(max(self.debounce, 5.0))
@@ -1,13 +1,14 @@
 import pandas as pd
 import streamlit as st
 from lib.data_store import read_csv, write_csv
+from lib.github_store import StaleWriteError
+from lib.schema import EVENT_STATUS
+from lib.ui import io_debug_sidebar, io_debug_start, show_write_error
 
 st.title("Event Manager")
+io_debug_start(__file__)
 
-EVENT_COLS = ["event_id","event_name","location","start_date","end_date","status"]
-STATUS_OPTIONS = ["Planned", "Open", "Confirmed", "Ongoing", "Completed", "Cancelled"]
-
-events = read_csv("data/events.csv", EVENT_COLS)
+events = read_csv("data/events.csv")
 
 st.subheader("Open event")
 
@@ -28,7 +29,7 @@ st.subheader("Event list")
 if events.empty:
     st.info("No events yet.")
 else:
-    st.dataframe(events[["event_id","event_name","location","start_date","end_date","status"]], use_container_width=True)
+    st.dataframe(events[["event_id","season","event_name","location","start_date","end_date","status"]], use_container_width=True)
 
 st.divider()
 st.subheader("Add new event")
@@ -39,7 +40,7 @@ with st.form("add_event"):
     location = st.text_input("location")
     start_date = st.text_input("start_date (YYYY-MM-DD)")
     end_date = st.text_input("end_date (YYYY-MM-DD)")
-    status = st.selectbox("status", STATUS_OPTIONS, index=0)
+    status = st.selectbox("status", EVENT_STATUS, index=0)
     add = st.form_submit_button("Add event")
 
 if add:
@@ -56,7 +57,14 @@ if add:
             "end_date": end_date.strip(),
             "status": status.strip(),
         }
+        sha = events.attrs.get("sha")
         events = pd.concat([events, pd.DataFrame([new_row])], ignore_index=True)
-        write_csv("data/events.csv", events, f"Add event {event_id.strip()}")
-        st.success("Added.")
-        st.rerun()
\ No newline at end of file
+        try:
+            write_csv("data/events.csv", events, f"Add event {event_id.strip()}", sha=sha)
+        except StaleWriteError as err:
+            show_write_error(err)
+        else:
+            st.success("Added.")
+            st.rerun()
+
+io_debug_sidebar()
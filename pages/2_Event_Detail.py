@@ -1,65 +1,54 @@
 import pandas as pd
 import streamlit as st
-from datetime import date, datetime
+from datetime import date
 
-from lib.data_store import read_csv, write_csv
+from lib.data_store import read_rows
+from lib.github_store import StaleWriteError
+from lib.schema import TASK_STATUS, typed_dates
+from lib.task_repo import task_repo
+from lib.typed import parse_dates
+from lib.ui import io_debug_sidebar, io_debug_start, pending_writes_sidebar, show_write_error
 
 # --------------------------------------------------
 # CONFIG
 # --------------------------------------------------
-EVENT_COLS = ["event_id","event_name","location","start_date","end_date","status"]
-TASK_COLS  = ["task_id","scope","event_id","task_name","due_date","owner","status","priority","category","notes"]
-
-TASK_STATUS = ["Not started","In progress","Done","Blocked"]
-
-today = date.today()
+today = pd.Timestamp(date.today())
 
 # --------------------------------------------------
 # HELPERS (SHARED LOGIC)
 # --------------------------------------------------
-def parse_date(s):
-    try:
-        return datetime.strptime(str(s), "%Y-%m-%d").date()
-    except:
-        return None
-
-def update_task(task_id, updates: dict):
-    base = read_csv("data/tasks.csv", TASK_COLS)
-    mask = base["task_id"].astype(str) == str(task_id)
-    for k, v in updates.items():
-        base.loc[mask, k] = v
-    write_csv("data/tasks.csv", base, f"Update task {task_id}")
-
 def mark_done(task_id):
-    update_task(task_id, {"status": "Done"})
+    task_repo.patch(task_id, {"status": "Done"})
 
 # --------------------------------------------------
 # LOAD DATA
 # --------------------------------------------------
-events = read_csv("data/events.csv", EVENT_COLS)
-tasks  = read_csv("data/tasks.csv", TASK_COLS)
+io_debug_start(__file__)
 
 # get selected event
 event_id = st.session_state.get("selected_event_id")
 if not event_id:
     st.warning("No event selected.")
+    io_debug_sidebar()
     st.stop()
 
-event = events[events["event_id"] == event_id]
+# only this event and its tasks are read, not the whole tables
+event = read_rows("data/events.csv", {"event_id": event_id})
 if event.empty:
     st.error("Event not found.")
+    io_debug_sidebar()
     st.stop()
 
 e = event.iloc[0]
 
-# normalize tasks
-tasks["due"] = tasks["due_date"].apply(parse_date)
-event_tasks = tasks[tasks["event_id"] == event_id].copy()
+tasks, _ = parse_dates(read_rows("data/tasks.csv", {"event_id": event_id}), typed_dates("data/tasks.csv"))
+event_tasks = tasks.copy()
 
 # --------------------------------------------------
 # EVENT HEADER
 # --------------------------------------------------
 st.title(f"🏐 {e['event_name']}")
+pending_writes_sidebar()
 
 st.write(f"📍 **Location:** {e['location']}")
 st.write(f"🗓️ **Dates:** {e['start_date']} → {e['end_date']}")
@@ -81,7 +70,7 @@ else:
     for _, r in event_tasks.iterrows():
         task_id = str(r["task_id"])
         is_done = r["status"] == "Done"
-        overdue = (r["due"] and r["due"] < today) and not is_done
+        overdue = pd.notna(r["due"]) and r["due"] < today and not is_done
 
         icon = "✅" if is_done else ("🔴" if overdue else "🟨")
 
@@ -103,9 +92,13 @@ else:
             with right:
                 if not is_done:
                     if st.button("✔ Done", key=f"done_task_{task_id}"):
-                        mark_done(task_id)
-                        st.success("Task marked as done.")
-                        st.rerun()
+                        try:
+                            mark_done(task_id)
+                        except StaleWriteError as err:
+                            show_write_error(err)
+                        else:
+                            st.success("Task marked as done.")
+                            st.rerun()
 
 # --------------------------------------------------
 # TASK POPUP (EDIT / MARK DONE)
@@ -148,30 +141,40 @@ if st.session_state.get("show_task_popup"):
                 close = b3.form_submit_button("Close")
 
             if save:
-                update_task(
-                    t["task_id"],
-                    {
-                        "task_name": task_name,
-                        "due_date": due_date,
-                        "owner": owner,
-                        "status": status_in,
-                        "priority": priority,
-                        "category": category,
-                        "notes": notes,
-                    }
-                )
-                st.session_state["show_task_popup"] = False
-                st.success("Task updated.")
-                st.rerun()
+                try:
+                    task_repo.patch(
+                        t["task_id"],
+                        {
+                            "task_name": task_name,
+                            "due_date": due_date,
+                            "owner": owner,
+                            "status": status_in,
+                            "priority": priority,
+                            "category": category,
+                            "notes": notes,
+                        }
+                    )
+                except StaleWriteError as err:
+                    show_write_error(err)
+                else:
+                    st.session_state["show_task_popup"] = False
+                    st.success("Task updated.")
+                    st.rerun()
 
             if done:
-                mark_done(t["task_id"])
-                st.session_state["show_task_popup"] = False
-                st.success("Task completed.")
-                st.rerun()
+                try:
+                    mark_done(t["task_id"])
+                except StaleWriteError as err:
+                    show_write_error(err)
+                else:
+                    st.session_state["show_task_popup"] = False
+                    st.success("Task completed.")
+                    st.rerun()
 
             if close:
                 st.session_state["show_task_popup"] = False
                 st.rerun()
 
         task_dialog()
+
+io_debug_sidebar()
@@ -2,92 +2,83 @@ import pandas as pd
 import streamlit as st
 from datetime import date
 
-from lib.data_store import read_csv, write_csv
+from lib.data_store import read_tables
+from lib.github_store import StaleWriteError
+from lib.schema import SCOPES, TASK_STATUS
+from lib.search import task_search_index
+from lib.task_repo import task_repo
+from lib.task_views import SORT_KEYS, filter_tasks, n_pages, page_slice, sort_tasks
+from lib.ui import io_debug_sidebar, io_debug_start, pending_writes_sidebar, show_write_error
 
 # --------------------------------------------------
 # CONFIG
 # --------------------------------------------------
-TASK_COLS  = ["task_id","scope","event_id","task_name","due_date","owner","status","priority","category","notes"]
-EVENT_COLS = ["event_id","event_name","location","start_date","end_date","status"]
-
-TASK_STATUS = ["Not started","In progress","Done","Blocked"]
-SCOPE = ["General","Event"]
+PAGE_SIZES = [25, 50, 100, 200]
+DEFAULT_PAGE_SIZE = 50
 
 # --------------------------------------------------
 # HELPERS
 # --------------------------------------------------
-def next_int_id(df, col):
-    if df.empty:
-        return 1
-    s = pd.to_numeric(df[col], errors="coerce").dropna()
-    return int(s.max()) + 1 if not s.empty else 1
-
 def open_event(eid):
     st.session_state["selected_event_id"] = eid
     st.switch_page("pages/2_Event_Detail.py")
 
-def update_task(task_id, updates: dict):
-    base = read_csv("data/tasks.csv", TASK_COLS)
-    mask = base["task_id"].astype(str) == str(task_id)
-    for k, v in updates.items():
-        base.loc[mask, k] = v
-    write_csv("data/tasks.csv", base, f"Update task {task_id}")
-
 def mark_done(task_id):
-    update_task(task_id, {"status": "Done"})
+    task_repo.patch(task_id, {"status": "Done"})
 
 # --------------------------------------------------
 # PAGE
 # --------------------------------------------------
 st.title("📝 Tasks")
+io_debug_start(__file__)
+pending_writes_sidebar()
 
-events = read_csv("data/events.csv", EVENT_COLS)
-tasks  = read_csv("data/tasks.csv", TASK_COLS)
+tables = read_tables(["data/events.csv"], typed=["data/tasks.csv"])
+events = tables["data/events.csv"]
+tasks  = tables["data/tasks.csv"]
 
 # normalize scope
 tasks["scope"] = tasks["scope"].astype(str).fillna("")
 tasks.loc[tasks["scope"].str.strip() == "", "scope"] = "General"
 
 # enrich event name
+tasks_sha = tasks.attrs.get("sha")
 tasks = tasks.merge(
-    events[["event_id","event_name"]],
+    events[["event_id","event_name","location"]],
     on="event_id",
     how="left"
 )
 tasks["event_name"] = tasks["event_name"].fillna("")
+tasks["location"] = tasks["location"].fillna("")
+
+# built once per data version, then kept up to date by task_repo edits
+search_index = task_search_index(tasks, events, tasks_sha)
 
 # --------------------------------------------------
 # FILTERS
 # --------------------------------------------------
 st.subheader("Filters")
 
-c1, c2, c3 = st.columns([2,1.2,1.8])
+c1, c2, c3, c4 = st.columns([2,1.2,1.8,1.2])
 with c1:
-    q = st.text_input("Search", "")
+    q = st.text_input("Search", "", help="Matches word prefixes in name, event, owner, notes, category and location.")
 with c2:
-    scope = st.selectbox("Scope", ["All"] + SCOPE)
+    scope = st.selectbox("Scope", ["All"] + SCOPES)
 with c3:
     status = st.selectbox("Status", ["All"] + TASK_STATUS)
+with c4:
+    sort_by = st.selectbox("Sort by", list(SORT_KEYS))
 
-view = tasks.copy()
+# filter + sort the whole set, then render only one page of it
+view = sort_tasks(filter_tasks(tasks, q, scope, status, index=search_index), sort_by)
 
-if scope != "All":
-    view = view[view["scope"] == scope]
+today = pd.Timestamp(date.today())
 
-if status != "All":
-    view = view[view["status"] == status]
-
-if q.strip():
-    qq = q.lower()
-    view = view[
-        view["task_name"].str.lower().str.contains(qq, na=False) |
-        view["event_name"].str.lower().str.contains(qq, na=False) |
-        view["owner"].str.lower().str.contains(qq, na=False)
-    ]
-
-today = date.today().isoformat()
-view["is_done"] = view["status"] == "Done"
-view = view.sort_values(["is_done","due_date","task_name"])
+# back to page 1 whenever the result set changes
+filter_sig = (q, scope, status, sort_by)
+if st.session_state.get("tasks_filter_sig") != filter_sig:
+    st.session_state["tasks_filter_sig"] = filter_sig
+    st.session_state["tasks_page"] = 1
 
 st.divider()
 
@@ -99,10 +90,23 @@ st.subheader("Task list")
 if view.empty:
     st.info("No tasks found.")
 else:
-    for _, r in view.iterrows():
+    p1, p2 = st.columns([1,1])
+    with p1:
+        page_size = st.selectbox("Per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE))
+    pages = n_pages(len(view), page_size)
+    if st.session_state.get("tasks_page", 1) > pages:
+        st.session_state["tasks_page"] = pages
+    with p2:
+        page = st.number_input("Page", 1, pages, key="tasks_page")
+
+    rows, page, pages = page_slice(view, page, page_size)
+    first = (page - 1) * page_size + 1
+    st.caption(f"Showing {first}–{first + len(rows) - 1} of {len(view)} tasks (page {page}/{pages})")
+
+    for _, r in rows.iterrows():
         task_id = str(r["task_id"])
         is_done = r["status"] == "Done"
-        overdue = (str(r["due_date"]) < today) and not is_done
+        overdue = pd.notna(r["due"]) and r["due"] < today and not is_done
 
         icon = "✅" if is_done else ("🔴" if overdue else "🟨")
         scope_label = "General" if r["scope"] == "General" else r["event_name"]
@@ -123,9 +127,13 @@ else:
             with right:
                 if not is_done:
                     if st.button("✔ Done", key=f"done_{task_id}"):
-                        mark_done(task_id)
-                        st.success("Task marked as done.")
-                        st.rerun()
+                        try:
+                            mark_done(task_id)
+                        except StaleWriteError as err:
+                            show_write_error(err)
+                        else:
+                            st.success("Task marked as done.")
+                            st.rerun()
 
 # --------------------------------------------------
 # TASK DETAIL POPUP (VIEW + EDIT)
@@ -157,8 +165,8 @@ if st.session_state.get("show_task_popup"):
                 with c2:
                     scope_in = st.selectbox(
                         "Scope",
-                        SCOPE,
-                        index=SCOPE.index(t["scope"]) if t["scope"] in SCOPE else 0
+                        SCOPES,
+                        index=SCOPES.index(t["scope"]) if t["scope"] in SCOPES else 0
                     )
 
                     event_id = t["event_id"]
@@ -194,29 +202,37 @@ if st.session_state.get("show_task_popup"):
                     close = st.form_submit_button("Close")
 
             if save:
-                update_task(
-                    t["task_id"],
-                    {
-                        "task_name": task_name,
-                        "due_date": due_date,
-                        "owner": owner,
-                        "status": status_in,
-                        "scope": scope_in,
-                        "event_id": event_id,
-                        "priority": priority,
-                        "category": category,
-                        "notes": notes,
-                    }
-                )
-                st.session_state["show_task_popup"] = False
-                st.success("Task updated.")
-                st.rerun()
+                try:
+                    task_repo.patch(
+                        t["task_id"],
+                        {
+                            "task_name": task_name,
+                            "due_date": due_date,
+                            "owner": owner,
+                            "status": status_in,
+                            "scope": scope_in,
+                            "event_id": event_id,
+                            "priority": priority,
+                            "category": category,
+                            "notes": notes,
+                        }
+                    )
+                except StaleWriteError as err:
+                    show_write_error(err)
+                else:
+                    st.session_state["show_task_popup"] = False
+                    st.success("Task updated.")
+                    st.rerun()
 
             if done:
-                mark_done(t["task_id"])
-                st.session_state["show_task_popup"] = False
-                st.success("Task completed.")
-                st.rerun()
+                try:
+                    mark_done(t["task_id"])
+                except StaleWriteError as err:
+                    show_write_error(err)
+                else:
+                    st.session_state["show_task_popup"] = False
+                    st.success("Task completed.")
+                    st.rerun()
 
             if close:
                 st.session_state["show_task_popup"] = False
@@ -231,7 +247,7 @@ st.divider()
 st.subheader("Add new task")
 
 with st.form("add_task"):
-    scope_in = st.selectbox("Scope", SCOPE)
+    scope_in = st.selectbox("Scope", SCOPES)
 
     event_id = ""
     if scope_in == "Event" and not events.empty:
@@ -250,11 +266,7 @@ with st.form("add_task"):
     add = st.form_submit_button("Add task")
 
 if add:
-    base = read_csv("data/tasks.csv", TASK_COLS)
-    new_id = str(next_int_id(base,"task_id"))
-
     row = {
-        "task_id": new_id,
         "scope": scope_in,
         "event_id": event_id if scope_in=="Event" else "",
         "task_name": task_name,
@@ -266,7 +278,12 @@ if add:
         "notes": notes,
     }
 
-    base = pd.concat([base, pd.DataFrame([row])], ignore_index=True)
-    write_csv("data/tasks.csv", base, f"Add task {new_id}")
-    st.success("Task added.")
-    st.rerun()
+    try:
+        task_repo.insert_many([row])
+    except StaleWriteError as err:
+        show_write_error(err)
+    else:
+        st.success("Task added.")
+        st.rerun()
+
+io_debug_sidebar()
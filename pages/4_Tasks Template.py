@@ -1,26 +1,22 @@
 import pandas as pd
 import streamlit as st
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from lib.data_store import read_csv, write_csv
-
-TPL_COLS  = ["template_id","scope","template_name","task_name","due_offset_days","default_owner","category","priority"]
-EVENT_COLS = ["event_id","event_name","location","start_date","end_date","status"]
-TASK_COLS  = ["task_id","scope","event_id","task_name","due_date","owner","status","priority","category","notes"]
-
-SCOPE = ["Event","General"]
-
-def next_int_id(df, col):
-    if df.empty or col not in df.columns:
-        return 1
-    s = pd.to_numeric(df[col], errors="coerce").dropna()
-    return int(s.max()) + 1 if not s.empty else 1
+from lib.data_store import read_csv, read_tables, write_csv
+from lib.github_store import StaleWriteError
+from lib.ids import note_version, reserve_ids
+from lib.schema import SCOPES
+from lib.task_repo import task_repo
+from lib.templates import apply_event_template, expand_event_template, expand_general_template, skipped_rows
+from lib.ui import io_debug_sidebar, io_debug_start, show_write_error
 
 st.title("Task Templates")
+io_debug_start(__file__)
 
-tpl = read_csv("data/task_templates.csv", TPL_COLS)
-events = read_csv("data/events.csv", EVENT_COLS)
-tasks  = read_csv("data/tasks.csv", TASK_COLS)
+tables = read_tables(["data/task_templates.csv", "data/events.csv", "data/tasks.csv"])
+tpl = tables["data/task_templates.csv"]
+events = tables["data/events.csv"]
+tasks  = tables["data/tasks.csv"]
 
 # normalize template scope
 tpl["scope"] = tpl["scope"].astype(str).fillna("")
@@ -28,7 +24,7 @@ tpl.loc[tpl["scope"].str.strip().eq(""), "scope"] = "Event"
 
 st.subheader("Add template row")
 with st.form("add_tpl"):
-    scope = st.selectbox("Scope", SCOPE, index=0)
+    scope = st.selectbox("Scope", SCOPES, index=SCOPES.index("Event"))
     template_name = st.text_input("template_name", value="AVC Standard")
     task_name = st.text_input("task_name")
     due_offset_days = st.number_input("due_offset_days", value=0, step=1,
@@ -39,8 +35,8 @@ with st.form("add_tpl"):
     add = st.form_submit_button("Add row")
 
 if add:
-    base = read_csv("data/task_templates.csv", TPL_COLS)
-    new_id = str(next_int_id(base, "template_id"))
+    base = read_csv("data/task_templates.csv")
+    new_id = reserve_ids("data/task_templates.csv", base, 1)[0]
     row = {
         "template_id": new_id,
         "scope": scope,
@@ -51,10 +47,17 @@ if add:
         "category": category.strip(),
         "priority": priority.strip(),
     }
+    sha = base.attrs.get("sha")
     base = pd.concat([base, pd.DataFrame([row])], ignore_index=True)
-    write_csv("data/task_templates.csv", base, f"Add template row {new_id}")
-    st.success("Added.")
-    st.rerun()
+    try:
+        # no rebase: the saved version is exactly base + row, so its ids are all below the mark
+        new_sha = write_csv("data/task_templates.csv", base, f"Add template row {new_id}", sha=sha, rebase=False)
+        note_version("data/task_templates.csv", new_sha)
+    except StaleWriteError as err:
+        show_write_error(err)
+    else:
+        st.success("Added.")
+        st.rerun()
 
 st.divider()
 st.subheader("View / Edit templates")
@@ -71,20 +74,28 @@ else:
     with c1:
         if st.button("Save changes"):
             out = edited.drop(columns=["delete"], errors="ignore")
-            write_csv("data/task_templates.csv", out, "Update templates")
-            st.success("Saved.")
-            st.rerun()
+            try:
+                write_csv("data/task_templates.csv", out, "Update templates", sha=tpl.attrs.get("sha"))
+            except StaleWriteError as err:
+                show_write_error(err)
+            else:
+                st.success("Saved.")
+                st.rerun()
     with c2:
         if st.button("Delete checked"):
             to_del = edited[edited["delete"] == True]
             out = tpl[~tpl["template_id"].isin(to_del["template_id"].astype(str))].copy()
-            write_csv("data/task_templates.csv", out, "Delete template rows")
-            st.success("Deleted.")
-            st.rerun()
+            try:
+                write_csv("data/task_templates.csv", out, "Delete template rows")
+            except StaleWriteError as err:
+                show_write_error(err)
+            else:
+                st.success("Deleted.")
+                st.rerun()
 
 st.divider()
 st.subheader("Apply template (General tasks only)")
-st.caption("This applies General templates into tasks.csv (useful for office work). Event templates are applied inside Event Detail later if you want.")
+st.caption("This applies General templates into tasks.csv (useful for office work). Event templates are applied to events below.")
 
 general_templates = sorted([x for x in tpl[tpl["scope"].str.lower()=="general"]["template_name"].unique().tolist() if str(x).strip()])
 if not general_templates:
@@ -92,31 +103,44 @@ if not general_templates:
 else:
     tname = st.selectbox("Template", general_templates)
     if st.button("Apply now (creates tasks due today+offset)"):
-        base_tasks = read_csv("data/tasks.csv", TASK_COLS)
-        new_id = next_int_id(base_tasks, "task_id")
-
-        rows = tpl[(tpl["scope"].str.lower()=="general") & (tpl["template_name"]==tname)].copy()
-        today = datetime.today().date()
-
-        out_rows = []
-        for _, r in rows.iterrows():
-            offset = int(pd.to_numeric(r["due_offset_days"], errors="coerce") or 0)
-            due = today + timedelta(days=offset)
-            out_rows.append({
-                "task_id": str(new_id),
-                "scope": "General",
-                "event_id": "",
-                "task_name": r["task_name"],
-                "due_date": due.isoformat(),
-                "owner": r["default_owner"],
-                "status": "Not started",
-                "priority": r["priority"],
-                "category": r["category"],
-                "notes": f"From template: {tname}",
-            })
-            new_id += 1
-
-        base_tasks = pd.concat([base_tasks, pd.DataFrame(out_rows)], ignore_index=True)
-        write_csv("data/tasks.csv", base_tasks, f"Apply General template {tname}")
-        st.success("Applied.")
-        st.rerun()
+        out_rows = expand_general_template(tpl, tname, datetime.today().date())
+        try:
+            task_repo.insert_frame(out_rows, f"Apply General template {tname}")
+        except StaleWriteError as err:
+            show_write_error(err)
+        else:
+            st.success("Applied.")
+            st.rerun()
+
+st.divider()
+st.subheader("Apply Event template to events")
+st.caption("Creates the template's tasks for every selected event (due = event start_date + offset) in one commit. "
+           "Tasks an event already has are skipped, so re-applying is safe.")
+
+event_templates = sorted([x for x in tpl[tpl["scope"].str.lower()=="event"]["template_name"].unique().tolist() if str(x).strip()])
+if not event_templates:
+    st.info("No Event templates yet.")
+elif events.empty:
+    st.info("No events yet.")
+else:
+    ename = st.selectbox("Event template", event_templates)
+    seasons = sorted([s for s in events["season"].astype(str).unique().tolist() if s.strip()], reverse=True)
+    chosen_seasons = st.multiselect("Seasons", seasons, default=seasons[:1])
+    in_season = events[events["season"].astype(str).isin(chosen_seasons)]
+    labels = dict(zip(in_season["event_id"], in_season["start_date"] + " — " + in_season["event_name"]))
+    chosen = st.multiselect("Events", list(labels), default=list(labels), format_func=lambda e: labels.get(e, e))
+
+    preview = expand_event_template(tpl, ename, in_season[in_season["event_id"].isin(chosen)])
+    skipped = int(skipped_rows(preview, tasks).sum())
+    st.write(f"{len(preview) - skipped} new task(s) for {len(chosen)} event(s); {skipped} already exist and will be skipped.")
+
+    if st.button("Apply to selected events", disabled=not chosen or len(preview) == skipped):
+        try:
+            ids, skipped = apply_event_template(ename, chosen)
+        except StaleWriteError as err:
+            show_write_error(err)
+        else:
+            st.success(f"Created {len(ids)} task(s); skipped {skipped} existing.")
+            st.rerun()
+
+io_debug_sidebar()
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from lib.backends import _candidate_rows, filter_rows, parse_csv_bytes, stream_csv_rows
+from lib.data_store import read_csv, read_rows
+
+HEADER = "task_id,event_id,task_name,notes\n"
+
+CASES = {
+    "quoted values": (
+        HEADER + '1,"E1",book venue,\n2,E2,"E1",\n3,"E1","x"\n', {"event_id": "E1"}),
+    "embedded commas and quotes": (
+        HEADER + '1,"E1,a","say ""E1,a""",\n2,E2,"E1,a",\n3,"E1,a",plain,"E1,a"\n', {"event_id": "E1,a"}),
+    "quote in the wanted value": (
+        HEADER + '1,"E""1",a,\n2,E2,"E""1",\n3,"E""1",b,\n', {"event_id": 'E"1'}),
+    "multi-line fields": (
+        HEADER + '1,E1,"line one\nE2 on line two",\n2,E2,"notes\n""quoted""\nE1",x\n3,E1,c,"a\nb"\n',
+        {"event_id": ["E1", "E2"]}),
+    "CRLF": (
+        HEADER.replace("\n", "\r\n") + '1,E1,a,"x\r\ny"\r\n2,E2,E1,\r\n3,E1,c,\r\n', {"event_id": "E1"}),
+    "no match": (
+        HEADER + "1,E1,a,\n2,E2,b,\n", {"event_id": "E9"}),
+}
+
+def _expected(data: bytes, where: dict, columns=None) -> pd.DataFrame:
+    return filter_rows(parse_csv_bytes(data), where, columns)
+
+@pytest.mark.parametrize("text,where", CASES.values(), ids=CASES.keys())
+def test_prefiltered_rows_match_a_full_parse(text, where):
+    data = text.encode("utf-8")
+    assert _candidate_rows(data, where) is not None   # the byte pre-filter is actually used
+    pd.testing.assert_frame_equal(stream_csv_rows(data, where), _expected(data, where))
+    columns = ["task_id", "notes"]
+    pd.testing.assert_frame_equal(stream_csv_rows(data, where, columns), _expected(data, where, columns))
+
+@pytest.mark.parametrize("text,where", CASES.values(), ids=CASES.keys())
+def test_read_rows_matches_filtering_read_csv(text, where, tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "tasks.csv").write_bytes(text.encode("utf-8"))
+    monkeypatch.setenv("DATA_BACKEND", "local")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    for flag in ("JOURNAL", "WRITE_BEHIND", "PARTITIONS"):
+        monkeypatch.delenv(flag, raising=False)
+    got = read_rows("data/tasks.csv", where)
+    full = filter_rows(read_csv("data/tasks.csv"), where)
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), full[got.columns.tolist()], check_dtype=False)
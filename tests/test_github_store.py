@@ -0,0 +1,46 @@
+import pytest
+import requests
+
+from bench.fake_github import FakeGitHub
+from lib import github_store
+
+POOL_SIZE = 2
+
+@pytest.fixture
+def fake(tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "events.csv").write_text("event_id\n1\n")
+    server = FakeGitHub().start()
+    server.repo.seed(str(tmp_path), server.branch)
+    for key, value in {
+        "GITHUB_API_URL": server.url, "GITHUB_OWNER": "o", "GITHUB_REPO": "r", "GITHUB_TOKEN": "t",
+        "GITHUB_BRANCH": server.branch, "GITHUB_POOL_SIZE": str(POOL_SIZE), "GITHUB_SYNC_DIRS": "",
+        "GITHUB_MAX_RPS": "1000", "GITHUB_BURST": "1000", "BLOB_CACHE": "0",
+    }.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setattr(github_store, "_session", None)
+    monkeypatch.setattr(github_store, "_bucket", None)
+    github_store.clear_cache()
+    yield server
+    server.stop()
+    github_store.clear_cache()
+
+def _connections_opened(server) -> int:
+    session, _ = github_store._http()
+    pools = session.get_adapter(server.url).poolmanager.pools
+    return sum(pools[key].num_connections for key in pools.keys())
+
+def test_failed_reads_give_their_connection_back(fake):
+    for _ in range(POOL_SIZE + 2):
+        with pytest.raises(requests.HTTPError):
+            github_store.github_read_bytes("data/missing.csv")
+    assert _connections_opened(fake) == 1
+
+def test_server_errors_give_their_connection_back(fake):
+    fake.error_rate = 1.0
+    for _ in range(POOL_SIZE + 2):
+        with pytest.raises(requests.HTTPError):
+            github_store.github_read_blob("0" * 40)
+    assert _connections_opened(fake) == 1
+    fake.error_rate = 0.0
+    assert github_store.github_read_bytes("data/events.csv")[0] == b"event_id\n1\n"
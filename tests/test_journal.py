@@ -0,0 +1,24 @@
+import pandas as pd
+
+from lib.journal import encode, replay
+
+def _base() -> pd.DataFrame:
+    return pd.DataFrame({"task_id": ["1", "2"], "status": ["Open", "Open"]})
+
+def test_delete_then_insert_replaces_the_base_row():
+    text = encode([
+        {"op": "delete", "key": "1"},
+        {"op": "insert", "row": {"task_id": "1", "status": "New"}},
+    ])
+    out = replay(_base(), "task_id", text)
+    assert out["task_id"].tolist() == ["2", "1"]
+    assert out.set_index("task_id").loc["1", "status"] == "New"
+
+def test_insert_patch_delete_leaves_nothing():
+    text = encode([
+        {"op": "insert", "row": {"task_id": "3", "status": "Open"}},
+        {"op": "patch", "key": "3", "set": {"status": "Done"}},
+        {"op": "delete", "key": "3"},
+    ])
+    out = replay(_base(), "task_id", text)
+    assert out["task_id"].tolist() == ["1", "2"]
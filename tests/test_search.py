@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from lib import ids, search
+from lib.data_store import journal_append, journal_enabled, read_csv, write_csv
+from lib.journal import insert_records
+from lib.task_repo import TASK_COLS, TASKS_PATH, task_repo
+
+@pytest.fixture(params=["", "1"], ids=["csv", "journal"])
+def tasks(request, tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    pd.DataFrame({"task_id": ["1", "2"], "task_name": ["book venue", "order food"]}) \
+        .reindex(columns=TASK_COLS, fill_value="").to_csv(tmp_path / "data" / "tasks.csv", index=False)
+    monkeypatch.setenv("DATA_BACKEND", "local")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    for flag in ("WRITE_BEHIND", "PARTITIONS"):
+        monkeypatch.delenv(flag, raising=False)
+    monkeypatch.setenv("JOURNAL", request.param)
+    monkeypatch.setattr(ids, "_marks", {})
+    monkeypatch.setattr(search, "_shared", {"key": None, "index": None})
+    return read_csv(TASKS_PATH)
+
+def _events() -> pd.DataFrame:
+    events = pd.DataFrame(columns=["event_id", "event_name", "location"])
+    events.attrs["sha"] = "events"
+    return events
+
+def test_own_edit_moves_the_index_to_the_new_version(tasks):
+    index = search.task_search_index(tasks, _events())
+    task_repo.patch("1", {"task_name": "book hall"})
+    latest = read_csv(TASKS_PATH)
+    assert search.task_search_index(latest, _events()) is index
+    assert index.search("hall") == ["1"]
+
+def test_edit_merged_onto_another_save_rebuilds_the_index(tasks, monkeypatch):
+    index = search.task_search_index(tasks, _events())
+    row = {"task_id": "3", "task_name": "hire band"}
+    if journal_enabled(TASKS_PATH):
+        journal_append(TASKS_PATH, insert_records([row]), "Add task 3", tasks.attrs["sha"])
+    else:
+        other = pd.concat([tasks, pd.DataFrame([row])], ignore_index=True)
+        write_csv(TASKS_PATH, other.fillna(""), "Add task 3", sha=tasks.attrs["sha"])
+    with monkeypatch.context() as m:
+        m.setattr(task_repo, "load", lambda: tasks)  # read just before the save above
+        task_repo.patch("1", {"task_name": "book hall"})
+    assert search._shared["key"] is None
+    latest = read_csv(TASKS_PATH)
+    rebuilt = search.task_search_index(latest, _events())
+    assert rebuilt is not index
+    assert rebuilt.search("band") == ["3"]
@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+from lib import data_store
+from lib.data_store import read_typed
+from lib.snapshots import snapshots_enabled
+
+def _sqlite_store(root, monkeypatch, names: list[str]):
+    (root / "data").mkdir(parents=True)
+    pd.DataFrame({"task_id": [str(i + 1) for i in range(len(names))], "task_name": names}) \
+        .to_csv(root / "data" / "tasks.csv", index=False)
+    monkeypatch.setenv("DATA_DIR", str(root))
+    monkeypatch.setenv("DATA_SQLITE_PATH", str(root / "db.sqlite3"))
+
+@pytest.mark.skipif(not snapshots_enabled(), reason="needs pyarrow")
+def test_snapshots_are_not_shared_between_databases(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_BACKEND", "sqlite")
+    monkeypatch.setenv("SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    for flag in ("JOURNAL", "WRITE_BEHIND", "PARTITIONS"):
+        monkeypatch.delenv(flag, raising=False)
+
+    _sqlite_store(tmp_path / "a", monkeypatch, ["book venue"])
+    first = read_typed("data/tasks.csv")
+    _sqlite_store(tmp_path / "b", monkeypatch, ["hire band", "print badges"])
+    monkeypatch.setattr(data_store, "_typed", {})  # a fresh process: only the snapshot files are left
+    second = read_typed("data/tasks.csv")
+
+    assert first.attrs["sha"] == second.attrs["sha"]
+    assert second["task_name"].tolist() == ["hire band", "print badges"]
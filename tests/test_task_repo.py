@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from lib import ids
+from lib.data_store import read_csv, write_csv
+from lib.task_repo import TASK_COLS, TaskRepo
+
+PATH = "data/tasks.csv"
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    pd.DataFrame({"task_id": ["1", "2"], "task_name": ["a", "b"]}).reindex(columns=TASK_COLS, fill_value="") \
+        .to_csv(tmp_path / "data" / "tasks.csv", index=False)
+    monkeypatch.setenv("DATA_BACKEND", "local")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    for flag in ("JOURNAL", "WRITE_BEHIND", "PARTITIONS"):
+        monkeypatch.delenv(flag, raising=False)
+    monkeypatch.setattr(ids, "_marks", {})
+    return TaskRepo()
+
+def _other_writer_adds(task_id: str):
+    """Another process appends a row with its own id (so our id marks never see it)."""
+    df = read_csv(PATH)
+    row = pd.DataFrame([{"task_id": task_id, "task_name": f"other {task_id}"}])
+    write_csv(PATH, pd.concat([df, row], ignore_index=True).fillna(""), f"Add task {task_id}", sha=df.attrs["sha"])
+
+def _stale_once(repo, monkeypatch):
+    """The next repo.load() returns the table as it is now, as if read just before another writer saved."""
+    stale = repo.load()
+    real_load = TaskRepo.load
+    calls = []
+
+    def load():
+        calls.append(1)
+        return stale if len(calls) == 1 else real_load(repo)
+    monkeypatch.setattr(repo, "load", load)
+
+def _ids_in_table() -> list[str]:
+    return read_csv(PATH)["task_id"].astype(str).tolist()
+
+def test_insert_after_someone_else_saved_keeps_ids_unique(repo, monkeypatch):
+    _stale_once(repo, monkeypatch)
+    _other_writer_adds("7")
+    repo.insert_many([{"task_name": "mine"}])
+    repo.insert_many([{"task_name": f"next {i}"} for i in range(6)])
+    table = _ids_in_table()
+    assert len(table) == len(set(table)) == 10
+
+def test_journal_insert_sees_ids_compacted_into_the_base(repo, monkeypatch):
+    monkeypatch.setenv("JOURNAL", "1")
+    _stale_once(repo, monkeypatch)
+    _other_writer_adds("3")  # rewrites the base with an empty journal, like a compaction
+    new_ids = repo.insert_many([{"task_name": "mine"}])
+    assert new_ids != ["3"]
+    repo.insert_many([{"task_name": f"next {i}"} for i in range(3)])
+    table = _ids_in_table()
+    assert len(table) == len(set(table)) == 7
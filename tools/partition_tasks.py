@@ -0,0 +1,116 @@
+"""
+Split a table into the partitioned layout (one CSV per event, by season).
+
+    python -m tools.partition_tasks                 # data/tasks.csv on the configured backend
+    DATA_BACKEND=local DATA_DIR=/tmp/ops python -m tools.partition_tasks --dry-run
+    python -m tools.partition_tasks --merge-back    # back to the single file
+
+Writes every shard and the manifest in one commit, reads them back and checks
+that they hold exactly the rows of the source, then prints the shard counts.
+Reads switch to the shards once PARTITIONS=1 is set. The source CSV is left
+in place but is not updated while the table is partitioned, so reads refuse
+the table while a manifest exists and PARTITIONS is off. --merge-back undoes
+the split: it writes the shards' rows into the single CSV and removes the
+shards and the manifest, in one commit. Run it before turning PARTITIONS
+off, or before splitting again (e.g. after events changed season).
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+from lib.backends import get_backend
+from lib.data_store import PARTITIONED, ensure_cols, read_csv
+from lib.journal import journal_path
+from lib.partitions import decode_manifest, encode_manifest, manifest_path, new_manifest, shard_for, split
+from lib.schema import columns, key_column
+
+def plan(path: str) -> tuple[dict[str, str], dict, pd.DataFrame]:
+    """({shard: csv text}, manifest, source rows) for the current contents of path."""
+    by, table, group_col = PARTITIONED[path]
+    df = read_csv(path)
+    refs = read_csv(table, [by, group_col])
+    groups = dict(zip(refs[by].astype(str).str.strip(), refs[group_col]))
+    manifest = new_manifest(by)
+    files = {}
+    for value, part in split(df, by).items():
+        shard = shard_for(path, value, groups.get(value, ""))
+        manifest["shards"][value] = shard
+        files[shard] = part.to_csv(index=False)
+    return files, manifest, df
+
+def _same_rows(path: str, got: pd.DataFrame, want: pd.DataFrame):
+    key = key_column(path)
+    cols = list(want.columns)
+    want = want[cols].sort_values(key, kind="stable").reset_index(drop=True)
+    got = got.reindex(columns=cols, fill_value="").sort_values(key, kind="stable").reset_index(drop=True)
+    if not want.equals(got):
+        raise RuntimeError(f"{path} does not match what was written ({len(got)} rows read back, {len(want)} expected).")
+
+def _read_shards(manifest: dict) -> tuple[pd.DataFrame, dict[str, str]]:
+    """(all shard rows, {shard: version})"""
+    backend = get_backend()
+    frames, versions = [], {}
+    for shard in dict.fromkeys(manifest["shards"].values()):
+        df, versions[shard] = backend.read_frame(shard)
+        frames.append(df)
+    return (pd.concat(frames, ignore_index=True).fillna("") if frames else pd.DataFrame()), versions
+
+def merge_back(path: str, manifest: dict, manifest_sha: str) -> pd.DataFrame:
+    """Write the shards of path back into its single CSV and remove them and the manifest."""
+    backend = get_backend()
+    mpath = manifest_path(path)
+    rows, versions = _read_shards(manifest)
+    rows = ensure_cols(rows, columns(path))
+    files = {path: rows.to_csv(index=False), mpath: None, **{shard: None for shard in versions}}
+    expected = {path: backend.version(path), mpath: manifest_sha, **versions}
+    jpath = journal_path(path)
+    journal_sha = backend.read_text(jpath)[1]
+    if journal_sha:
+        # its entries were folded into the shards when the table was split
+        files[jpath], expected[jpath] = "", journal_sha
+    backend.write_texts(files, f"Merge {mpath.rpartition('/')[0]} back into {path}", expected)
+    _same_rows(path, backend.read_frame(path)[0], rows)
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--table", default="data/tasks.csv", choices=sorted(PARTITIONED))
+    ap.add_argument("--dry-run", action="store_true", help="only print the layout")
+    ap.add_argument("--rebuild", action="store_true", help="write even if shard files already exist")
+    ap.add_argument("--merge-back", action="store_true", help="write the shards back into the single CSV")
+    args = ap.parse_args()
+
+    backend = get_backend()
+    if not backend.supports_text:
+        sys.exit(f"The {backend.name} backend cannot store a partitioned table.")
+    mpath = manifest_path(args.table)
+    text, manifest_sha = backend.read_text(mpath)
+    manifest = decode_manifest(text)
+
+    if args.merge_back:
+        if manifest is None:
+            sys.exit(f"{args.table} is not partitioned ({mpath} does not exist).")
+        rows = merge_back(args.table, manifest, manifest_sha)
+        print(f"Wrote {len(rows)} rows to {args.table} and removed {mpath}; PARTITIONS can be turned off.")
+        return
+    if manifest is not None:
+        sys.exit(f"{mpath} already exists: {args.table} is partitioned.")
+
+    files, manifest, source = plan(args.table)
+    seasons = pd.Series([s.rpartition("/")[0] for s in files]).value_counts().sort_index()
+    print(f"{args.table}: {len(source)} rows -> {len(files)} shard(s)")
+    print(seasons.to_string(header=False))
+    if args.dry_run:
+        return
+
+    # one commit, manifest last, so no reader ever finds half a layout
+    expected = {shard: None for shard in files} if not args.rebuild else {}
+    expected[mpath] = None
+    backend.write_texts({**files, mpath: encode_manifest(manifest)},
+                        f"Partition {args.table} by {manifest['by']}", expected)
+    _same_rows(args.table, _read_shards(manifest)[0], source)
+    print(f"Wrote {mpath}; set PARTITIONS=1 to use it.")
+
+if __name__ == "__main__":
+    main()